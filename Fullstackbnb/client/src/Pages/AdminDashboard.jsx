@@ -11,6 +11,7 @@ function AdminDashboard() {
   const [filterRole, setFilterRole] = useState('all');
   const [filterStatus, setFilterStatus] = useState('all');
   const [users, setUsers] = useState([]);
+  const [usersCursor, setUsersCursor] = useState(null);
   const [listings, setListings] = useState([]);
   const [analyticsData, setAnalyticsData] = useState({
     totalBookings: 0,
@@ -27,6 +28,55 @@ function AdminDashboard() {
     fetchData();
   }, []);
 
+  // Users are searched on the server, a moment after the admin stops typing
+  useEffect(() => {
+    const timer = setTimeout(() => loadUsers(), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  // The user list is paged, X-Next-Cursor is the cursor for the next page
+  const fetchUsersPage = async (cursor) => {
+    const params = new URLSearchParams();
+    if (searchTerm.trim()) params.set('q', searchTerm.trim());
+    if (cursor) params.set('cursor', cursor);
+    const usersRes = await fetch(`${import.meta.env.VITE_API_BASE_URL}/admin/users?${params}`, {
+      headers: { Authorization: `Bearer ${token}` }
+    });
+
+    if (!usersRes.ok) {
+      throw new Error(`Users fetch failed: ${usersRes.status}`);
+    }
+
+    const usersData = await usersRes.json();
+    return {
+      page: Array.isArray(usersData) ? usersData : usersData.users || [],
+      nextCursor: usersRes.headers.get('X-Next-Cursor')
+    };
+  };
+
+  const loadUsers = async () => {
+    if (!token) return;
+    try {
+      const { page, nextCursor } = await fetchUsersPage(null);
+      setUsers(page);
+      setUsersCursor(nextCursor);
+    } catch (error) {
+      console.error('Failed to fetch users:', error);
+    }
+  };
+
+  const loadMoreUsers = async () => {
+    if (!usersCursor) return;
+    try {
+      const { page, nextCursor } = await fetchUsersPage(usersCursor);
+      setUsers(prev => [...prev, ...page]);
+      setUsersCursor(nextCursor);
+    } catch (error) {
+      console.error('Failed to fetch more users:', error);
+      toast.error('Failed to load more users');
+    }
+  };
+
   const fetchData = async () => {
     try {
       if (!token) {
@@ -34,17 +84,6 @@ function AdminDashboard() {
         return;
       }
 
-      const usersRes = await fetch(`${import.meta.env.VITE_API_BASE_URL}/admin/users`, {
-        headers: { Authorization: `Bearer ${token}` }
-      });
-      
-      if (!usersRes.ok) {
-        throw new Error(`Users fetch failed: ${usersRes.status}`);
-      }
-      
-      const usersData = await usersRes.json();
-      setUsers(Array.isArray(usersData) ? usersData : usersData.users || []);
-
       // Fetch listings
       const listingsRes = await fetch(`${import.meta.env.VITE_API_BASE_URL}/admin/listings`, {
         headers: { Authorization: `Bearer ${token}` }
@@ -170,12 +209,11 @@ function AdminDashboard() {
     return colors[role] || 'bg-gray-500 text-white';
   };
 
+  // The search term is applied by the server (see loadUsers)
   const filteredUsers = users.filter(user => {
-    const matchesSearch = user.username?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         user.email?.toLowerCase().includes(searchTerm.toLowerCase());
     const matchesRole = filterRole === 'all' || user.role === filterRole;
     const matchesStatus = filterStatus === 'all' || user.status === filterStatus;
-    return matchesSearch && matchesRole && matchesStatus;
+    return matchesRole && matchesStatus;
   });
 
   const tabs = [
@@ -389,6 +427,17 @@ function AdminDashboard() {
                   </div>
                 ))}
               </div>
+
+              {usersCursor && (
+                <div className="flex justify-center">
+                  <button
+                    onClick={loadMoreUsers}
+                    className="px-6 py-2 bg-gray-700 border border-gray-600 rounded-lg text-white hover:bg-gray-600 transition-colors"
+                  >
+                    Load more users
+                  </button>
+                </div>
+              )}
             </div>
           )}
 
@@ -1,7 +1,7 @@
 import React, { useState } from 'react';
 import { Calendar } from "lucide-react";
 
-function BookingsTab({ bookings, onCancelBooking, onBrowseListings }) {
+function BookingsTab({ bookings, hasMore, onLoadMore, onCancelBooking, onBrowseListings }) {
   const [cancellingBookings, setCancellingBookings] = useState(new Set());
 
   const handleCancelClick = async (bookingId) => {
@@ -113,6 +113,16 @@ function BookingsTab({ bookings, onCancelBooking, onBrowseListings }) {
                 </div>
               );
             })}
+            {hasMore && (
+              <div className="text-center">
+                <button
+                  onClick={onLoadMore}
+                  className="px-6 py-3 border border-gray-300 text-gray-700 font-medium rounded-lg hover:bg-gray-50 transition-all duration-200"
+                >
+                  Load more bookings
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
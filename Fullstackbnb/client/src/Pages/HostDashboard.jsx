@@ -35,6 +35,30 @@ function HostDashboard() {
     return null;
   };
 
+  // The inbox is paged, so keep requesting until there is no next cursor
+  const fetchAllHostBookings = async (token) => {
+    const bookings = [];
+    let cursor = null;
+    do {
+      const url = `${import.meta.env.VITE_API_BASE_URL}/host/bookings`
+        + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : '');
+      const res = await fetch(url, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json'
+        }
+      });
+      const data = await res.json();
+      if (!Array.isArray(data)) {
+        console.error('Invalid bookings data:', data);
+        break;
+      }
+      bookings.push(...data);
+      cursor = res.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return bookings;
+  };
+
   // Fetch host's data on mount or tab change
   useEffect(() => {
     setAnimateCards(true);
@@ -66,22 +90,9 @@ function HostDashboard() {
         setListings([]);
       });
 
-    // Fetch host's bookings
-    fetch(`${import.meta.env.VITE_API_BASE_URL}/host/bookings`, {
-      headers: {
-        'Authorization': `Bearer ${token}`,
-        'Content-Type': 'application/json'
-      }
-    })
-      .then(res => res.json())
-      .then(data => {
-        if (Array.isArray(data)) {
-          setBookingRequests(data);
-        } else {
-          console.error('Invalid bookings data:', data);
-          setBookingRequests([]);
-        }
-      })
+    // Fetch host's bookings, following the X-Next-Cursor header page by page
+    fetchAllHostBookings(token)
+      .then(data => setBookingRequests(data))
       .catch(err => {
         console.error('Error fetching host bookings:', err);
         setBookingRequests([]);
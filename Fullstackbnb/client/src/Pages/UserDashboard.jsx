@@ -18,6 +18,8 @@ function UserDashboard() {
   const [selectedTab, setSelectedTab] = useState('browse');
   const [favorites, setFavorites] = useState([]);
   const [bookings, setBookings] = useState([]);
+  const [bookingsPage, setBookingsPage] = useState(1);
+  const [hasMoreBookings, setHasMoreBookings] = useState(false);
   const [listings, setListings] = useState([]);
   const [allListings, setAllListings] = useState([]); 
   const [reviews, setReviews] = useState([]);
@@ -42,6 +44,12 @@ function UserDashboard() {
     return null;
   };
 
+  // Booking history is paged by the server, X-Has-More says if there is more
+  const fetchBookingsPage = (token, page) =>
+    fetch(`${import.meta.env.VITE_API_BASE_URL}/bookings?page=${page}`, {
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+
   // Fetch all listings on component mount
   useEffect(() => {
     fetchData();
@@ -57,9 +65,7 @@ function UserDashboard() {
         fetch(`${import.meta.env.VITE_API_BASE_URL}/listings`, {
           headers: { 'Authorization': `Bearer ${token}` }
         }),
-        fetch(`${import.meta.env.VITE_API_BASE_URL}/bookings`, {
-          headers: { 'Authorization': `Bearer ${token}` }
-        }),
+        fetchBookingsPage(token, 1),
         fetch(`${import.meta.env.VITE_API_BASE_URL}/favorites`, {
           headers: { 'Authorization': `Bearer ${token}` }
         }),
@@ -79,6 +85,8 @@ function UserDashboard() {
       if (bookingsRes.ok) {
         const bookingsData = await bookingsRes.json();
         setBookings(bookingsData);
+        setBookingsPage(1);
+        setHasMoreBookings(bookingsRes.headers.get('X-Has-More') === 'true');
       } else {
         console.error('Failed to fetch bookings:', bookingsRes.status);
         setBookings([]);
@@ -191,7 +199,7 @@ function UserDashboard() {
 
       const data = await response.json();
       setBookings(prev => [...prev, data]); 
-      toast.success(`Booking successful! Total: $${totalPrice} for ${nights} ${nights === 1 ? 'night' : 'nights'}`);
+      toast.success(`Booking successful! Total: $${data.total_price ?? totalPrice} for ${nights} ${nights === 1 ? 'night' : 'nights'}`);
       setSelectedTab('bookings');
     } catch (err) {
       console.error('Booking error:', err);
@@ -271,19 +279,38 @@ function UserDashboard() {
     if (!token) return;
 
     try {
-      const bookingsRes = await fetch(`${import.meta.env.VITE_API_BASE_URL}/bookings`, {
-        headers: { 'Authorization': `Bearer ${token}` }
-      });
+      const bookingsRes = await fetchBookingsPage(token, 1);
       
       if (bookingsRes.ok) {
         const bookingsData = await bookingsRes.json();
         setBookings(bookingsData);
+        setBookingsPage(1);
+        setHasMoreBookings(bookingsRes.headers.get('X-Has-More') === 'true');
       }
     } catch (error) {
       console.error('Error refreshing bookings:', error);
     }
   };
 
+  const loadMoreBookings = async () => {
+    const token = getToken();
+    if (!token) return;
+
+    try {
+      const nextPage = bookingsPage + 1;
+      const bookingsRes = await fetchBookingsPage(token, nextPage);
+
+      if (bookingsRes.ok) {
+        const bookingsData = await bookingsRes.json();
+        setBookings(prev => [...prev, ...bookingsData]);
+        setBookingsPage(nextPage);
+        setHasMoreBookings(bookingsRes.headers.get('X-Has-More') === 'true');
+      }
+    } catch (error) {
+      console.error('Error loading more bookings:', error);
+    }
+  };
+
   const toggleFavorite = async (listingId) => {
     const currentToken = getToken();
     
@@ -588,7 +615,13 @@ function UserDashboard() {
         )}
 
         {selectedTab === 'bookings' && (
-          <BookingsTab bookings={bookings} onCancelBooking={handleCancelBooking} onBrowseListings={() => setSelectedTab('browse')} />
+          <BookingsTab
+            bookings={bookings}
+            hasMore={hasMoreBookings}
+            onLoadMore={loadMoreBookings}
+            onCancelBooking={handleCancelBooking}
+            onBrowseListings={() => setSelectedTab('browse')}
+          />
         )}
         {selectedTab === 'favorites' && (
           <FavoritesTab
@@ -2,7 +2,7 @@ import React from 'react';
 import { CheckCircle, XCircle } from 'lucide-react';
 
 function VerifyListings({ listings, updateListingStatus, getStatusColor }) {
-    const pendingListings = listings.filter(listing => listing.status === 'Pending');
+    const pendingListings = listings.filter(listing => listing.status === 'pending');
 
     return (
         <div>
@@ -2,6 +2,7 @@
 
 from app import app
 from models import db, User, Listing
+from locations import backfill_listing_locations
 from werkzeug.security import generate_password_hash
 
 def add_sample_data():
@@ -94,6 +95,7 @@ def add_sample_data():
             db.session.add(listing)
         
         db.session.commit()
+        backfill_listing_locations()
         print(f"✅ Successfully added {len(sample_listings)} sample listings to the database!")
         
         # Display what was added
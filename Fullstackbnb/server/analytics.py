@@ -0,0 +1,268 @@
+from datetime import datetime, timedelta
+import json
+import click
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models import db, User, Booking, BookingArchive, Listing, Location, AnalyticsSnapshot, DailyPlatformStats
+from cache import analytics_snapshot_cache
+from price_stats import refresh_price_stats
+from occupancy import as_day
+from leaderboards import ensure_trailing_leaderboards
+from jobs import start_background_job
+
+SNAPSHOT_ID = 1
+TIMESERIES_METRICS = ('revenue', 'bookings', 'new_users', 'new_listings')
+TIMESERIES_BUCKETS = ('day', 'week', 'month')
+
+
+def popular_locations(stays):
+    # Grouped on the integer location key, so spellings of one place add up
+    rows = db.session.query(
+        Location.name,
+        db.func.count(stays.c.id).label('booking_count'),
+        db.func.sum(stays.c.total_price).label('location_revenue')
+    ).join(Listing, Listing.location_id == Location.id).join(stays, stays.c.listing_id == Listing.id).group_by(
+        Location.id, Location.name
+    ).order_by(db.desc('booking_count')).limit(5).all()
+    return json.dumps([
+        {
+            'location': loc,
+            'bookings': count,
+            'revenue': revenue or 0
+        } for loc, count, revenue in rows
+    ])
+
+
+def compute_analytics():
+    total_bookings = Booking.query.count()
+    total_revenue = db.session.query(db.func.sum(Booking.total_price)).scalar() or 0
+    active_listings = Listing.query.filter_by(status='active').count()
+    total_users = User.query.count()
+    archived_bookings, archived_revenue = db.session.query(
+        db.func.count(BookingArchive.id), db.func.coalesce(db.func.sum(BookingArchive.total_price), 0)
+    ).one()
+    columns = ('id', 'listing_id', 'total_price')
+    all_stays = db.union_all(
+        db.select(*[getattr(Booking, column) for column in columns]),
+        db.select(*[getattr(BookingArchive, column) for column in columns])
+    ).subquery()
+
+    return {
+        'total_bookings': total_bookings,
+        'total_revenue': total_revenue,
+        'active_listings': active_listings,
+        'total_users': total_users,
+        'popular_locations': popular_locations(Booking.__table__),
+        'archived_bookings': archived_bookings,
+        'archived_revenue': archived_revenue,
+        'popular_locations_with_archive': popular_locations(all_stays)
+    }
+
+
+def with_archive(snapshot, include_archived):
+    # Responses leave archived bookings out unless asked for
+    snapshot = dict(snapshot)
+    archived = snapshot.pop('archived')
+    if include_archived:
+        snapshot['totalBookings'] += archived['bookings']
+        snapshot['totalRevenue'] += archived['revenue']
+        snapshot['popularLocations'] = archived['popularLocations']
+    snapshot['includesArchived'] = include_archived
+    return snapshot
+
+
+def snapshot_dict(snapshot):
+    return {
+        'totalBookings': snapshot.total_bookings,
+        'totalRevenue': snapshot.total_revenue,
+        'activeListings': snapshot.active_listings,
+        'totalUsers': snapshot.total_users,
+        'popularLocations': json.loads(snapshot.popular_locations),
+        'archived': {
+            'bookings': snapshot.archived_bookings,
+            'revenue': snapshot.archived_revenue,
+            'popularLocations': json.loads(snapshot.popular_locations_with_archive)
+        },
+        'refreshedAt': snapshot.refreshed_at
+    }
+
+
+def refresh_analytics_snapshot():
+    # Today's and yesterday's daily rows are still filling up, so they are
+    # rolled up again along with the totals
+    today = datetime.utcnow().date()
+    rollup_daily_stats(today - timedelta(days=1), today + timedelta(days=1))
+    values = compute_analytics()
+    values['refreshed_at'] = datetime.utcnow()
+    table = AnalyticsSnapshot.__table__
+    result = db.session.execute(table.update().where(table.c.id == SNAPSHOT_ID).values(**values))
+    if not result.rowcount:
+        try:
+            # Another worker may insert the row first, then theirs is updated
+            with db.session.begin_nested():
+                db.session.execute(table.insert().values(id=SNAPSHOT_ID, **values))
+        except IntegrityError:
+            db.session.execute(table.update().where(table.c.id == SNAPSHOT_ID).values(**values))
+    db.session.commit()
+    snapshot = snapshot_dict(AnalyticsSnapshot(**values))
+    analytics_snapshot_cache.set(SNAPSHOT_ID, snapshot)
+    return snapshot
+
+
+def request_analytics_refresh():
+    # The whole refresh job runs in a background thread, so the request that
+    # noticed the stale data doesn't wait for it
+    start_background_job(current_app._get_current_object(), refresh_analytics_job, 'analytics-refresh')
+
+
+def get_analytics_snapshot():
+    # Served from this worker's copy, then the snapshot row. A row older than
+    # the allowed age is still served while a refresh runs in the background;
+    # only a missing row is computed inline.
+    snapshot = analytics_snapshot_cache.get(SNAPSHOT_ID)
+    if snapshot is None:
+        row = db.session.get(AnalyticsSnapshot, SNAPSHOT_ID)
+        if row is not None:
+            snapshot = snapshot_dict(row)
+            analytics_snapshot_cache.set(SNAPSHOT_ID, snapshot)
+    if snapshot is None:
+        return refresh_analytics_snapshot()
+    max_age = current_app.config.get('ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS', 300)
+    if (datetime.utcnow() - snapshot['refreshedAt']).total_seconds() > max_age:
+        request_analytics_refresh()
+    return snapshot
+
+
+def rollup_daily_stats(start, end):
+    # Recomputes the daily rows for [start, end) from the created_at indexes
+    start_at = datetime.combine(start, datetime.min.time())
+    end_at = datetime.combine(end, datetime.min.time())
+    days = {}
+
+    def row(day):
+        return days.setdefault(as_day(day), {'bookings': 0, 'revenue': 0, 'new_users': 0, 'new_listings': 0})
+
+    # Archived bookings were created on their day too, so a rebuild covers both
+    for model in (Booking, BookingArchive):
+        booking_day = db.func.date(model.created_at)
+        for day, count, revenue in db.session.query(
+            booking_day, db.func.count(model.id), db.func.coalesce(db.func.sum(model.total_price), 0)
+        ).filter(model.created_at >= start_at, model.created_at < end_at).group_by(booking_day):
+            day_row = row(day)
+            day_row.update(bookings=day_row['bookings'] + count, revenue=day_row['revenue'] + revenue)
+
+    for model, field in ((User, 'new_users'), (Listing, 'new_listings')):
+        created_day = db.func.date(model.created_at)
+        for day, count in db.session.query(created_day, db.func.count(model.id)).filter(
+            model.created_at >= start_at, model.created_at < end_at
+        ).group_by(created_day):
+            row(day)[field] = count
+
+    table = DailyPlatformStats.__table__
+    db.session.execute(table.delete().where(table.c.date >= start, table.c.date < end))
+    if days:
+        db.session.execute(table.insert(), [dict(values, date=day) for day, values in days.items()])
+    return len(days)
+
+
+def deleted_stat_days(user_ids=(), listing_ids=(), booking_ids=()):
+    # The created_at days of everything a delete is about to remove, cascades
+    # included. Status changes leave the daily rows alone, deletes don't.
+    user_ids, listing_ids, booking_ids = list(user_ids), list(listing_ids), list(booking_ids)
+    listings = db.or_(Listing.id.in_(listing_ids), Listing.user_id.in_(user_ids))
+    queries = [
+        db.select(db.func.date(User.created_at)).where(User.id.in_(user_ids)),
+        db.select(db.func.date(Listing.created_at)).where(listings)
+    ]
+    for model in (Booking, BookingArchive):
+        queries.append(db.select(db.func.date(model.created_at)).where(db.or_(
+            model.id.in_(booking_ids),
+            model.user_id.in_(user_ids),
+            model.listing_id.in_(db.select(Listing.id).where(listings))
+        )))
+    days = set()
+    for query in queries:
+        days.update(as_day(day) for day in db.session.execute(query.distinct()).scalars() if day is not None)
+    return days
+
+
+def reroll_daily_stats(days):
+    # Call after the delete, before committing. Runs of consecutive days are
+    # rolled up as one range.
+    ranges = []
+    for day in sorted(days):
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+    for start, end in ranges:
+        rollup_daily_stats(start, end)
+
+
+def backfill_daily_stats(start=None, end=None, chunk_days=365):
+    if start is None:
+        earliest = [
+            db.session.query(db.func.min(model.created_at)).scalar()
+            for model in (Booking, BookingArchive, User, Listing)
+        ]
+        earliest = [value for value in earliest if value is not None]
+        if not earliest:
+            return 0
+        start = min(earliest).date()
+    end = end or datetime.utcnow().date() + timedelta(days=1)
+    total = 0
+    while start < end:
+        chunk_end = min(start + timedelta(days=chunk_days), end)
+        total += rollup_daily_stats(start, chunk_end)
+        db.session.commit()
+        start = chunk_end
+    return total
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def daily_timeseries(metric, bucket, start, end):
+    # A single range read on the date primary key, bucketed in Python
+    column = getattr(DailyPlatformStats, metric)
+    values = dict(db.session.query(DailyPlatformStats.date, column).filter(
+        DailyPlatformStats.date >= start,
+        DailyPlatformStats.date < end
+    ).all())
+
+    points = []
+    day = start
+    while day < end:
+        key = bucket_start(day, bucket)
+        if not points or points[-1]['start'] != key:
+            points.append({'start': key, 'value': 0})
+        points[-1]['value'] += values.get(day, 0)
+        day += timedelta(days=1)
+    return [{'start': point['start'].isoformat(), 'value': point['value']} for point in points]
+
+
+def refresh_analytics_job():
+    refresh_analytics_snapshot()
+    refresh_price_stats()
+    ensure_trailing_leaderboards()
+
+
+@click.command('refresh-analytics')
+def refresh_analytics_command():
+    """Recompute the admin analytics snapshot."""
+    snapshot = refresh_analytics_snapshot()
+    click.echo(f"Analytics snapshot refreshed at {snapshot['refreshedAt']:%Y-%m-%d %H:%M:%S}")
+
+
+@click.command('backfill-daily-stats')
+@click.option('--from', 'start', type=click.DateTime(formats=['%Y-%m-%d']), help='First day to roll up (default: earliest record).')
+@click.option('--to', 'end', type=click.DateTime(formats=['%Y-%m-%d']), help='Day to stop before (default: tomorrow).')
+def backfill_daily_stats_command(start, end):
+    """Rebuild daily_platform_stats from bookings, users and listings."""
+    days = backfill_daily_stats(start.date() if start else None, end.date() if end else None)
+    click.echo(f"Rolled up {days} days with activity")
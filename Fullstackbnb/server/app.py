@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from flask import Flask
-from models import db, User, Booking, Listing, Favorites, Review, TokenBlocklist
+from models import db, User, Booking, Listing, Favorites, Review, TokenBlocklist, CalendarBlock, BookingHold, ListingDailyOccupancy, HostEarnings, AnalyticsSnapshot, DailyPlatformStats
 from flask_migrate import Migrate
 from views.user import user_bp
 from views.host import host_blueprint
@@ -11,10 +11,24 @@ from views.booking import booking_bp
 from views.favorite import favorite_bp
 from views.review import review_bp
 from views.auth import auth_bp
+from views.calendar import calendar_bp
+from views.export import export_bp
+from views.hold import hold_bp
+from query_plans import check_query_plans
+from jobs import start_periodic_job, sweep_stale_reservations, complete_past_bookings
+from jobs import expire_pending_bookings_command, purge_expired_holds_command, complete_past_bookings_command
+from occupancy import backfill_occupancy_command
+from ledger import reconcile_host_earnings_command
+from analytics import refresh_analytics_job, refresh_analytics_command, backfill_daily_stats_command
+from price_stats import refresh_price_stats_command
+from locations import backfill_locations_command
+from archive import archive_bookings_command
+from leaderboards import rebuild_leaderboards_command
 from flask_cors import CORS
 import os
 from datetime import timedelta
 from flask_jwt_extended import JWTManager
+from cache import host_dashboard_cache, listing_insights_cache
 
 app = Flask(__name__)
 
@@ -33,6 +47,7 @@ CORS(app, resources={
         ],
         "methods": ["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
+        "expose_headers": ["X-Page", "X-Per-Page", "X-Has-More", "X-Next-Cursor"],
         "supports_credentials": True
     }
 })
@@ -53,6 +68,19 @@ app.config["JWT_SECRET_KEY"] = os.environ.get('JWT_SECRET', 'your-fallback-secre
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=3)
 jwt = JWTManager(app)
 
+# Booking configuration - pending requests stop blocking dates after the TTL, intervals of 0 disable a job
+app.config['PENDING_BOOKING_TTL_HOURS'] = int(os.environ.get('PENDING_BOOKING_TTL_HOURS', 48))
+app.config['PENDING_SWEEP_INTERVAL_SECONDS'] = int(os.environ.get('PENDING_SWEEP_INTERVAL_SECONDS', 0))
+app.config['CHECKOUT_HOLD_MINUTES'] = int(os.environ.get('CHECKOUT_HOLD_MINUTES', 10))
+app.config['AVAILABILITY_CACHE_SECONDS'] = int(os.environ.get('AVAILABILITY_CACHE_SECONDS', 15))
+app.config['BOOKING_LIFECYCLE_INTERVAL_SECONDS'] = int(os.environ.get('BOOKING_LIFECYCLE_INTERVAL_SECONDS', 0))
+app.config['HOST_DASHBOARD_CACHE_SECONDS'] = int(os.environ.get('HOST_DASHBOARD_CACHE_SECONDS', 300))
+host_dashboard_cache.ttl = app.config['HOST_DASHBOARD_CACHE_SECONDS']
+app.config['LISTING_INSIGHTS_CACHE_SECONDS'] = int(os.environ.get('LISTING_INSIGHTS_CACHE_SECONDS', 900))
+listing_insights_cache.ttl = app.config['LISTING_INSIGHTS_CACHE_SECONDS']
+app.config['ANALYTICS_REFRESH_INTERVAL_SECONDS'] = int(os.environ.get('ANALYTICS_REFRESH_INTERVAL_SECONDS', 0))
+app.config['ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS'] = int(os.environ.get('ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS', 300))
+
 # Register Blueprints
 app.register_blueprint(user_bp)
 app.register_blueprint(host_blueprint)
@@ -62,6 +90,31 @@ app.register_blueprint(booking_bp)
 app.register_blueprint(favorite_bp)
 app.register_blueprint(review_bp)
 app.register_blueprint(auth_bp)
+app.register_blueprint(calendar_bp)
+app.register_blueprint(hold_bp)
+app.register_blueprint(export_bp)
+
+# CLI commands
+app.cli.add_command(check_query_plans)
+app.cli.add_command(expire_pending_bookings_command)
+app.cli.add_command(purge_expired_holds_command)
+app.cli.add_command(complete_past_bookings_command)
+app.cli.add_command(backfill_occupancy_command)
+app.cli.add_command(reconcile_host_earnings_command)
+app.cli.add_command(refresh_analytics_command)
+app.cli.add_command(backfill_daily_stats_command)
+app.cli.add_command(refresh_price_stats_command)
+app.cli.add_command(backfill_locations_command)
+app.cli.add_command(archive_bookings_command)
+app.cli.add_command(rebuild_leaderboards_command)
+
+# Background jobs (an interval of 0 disables one)
+if app.config['PENDING_SWEEP_INTERVAL_SECONDS']:
+    start_periodic_job(app, sweep_stale_reservations, app.config['PENDING_SWEEP_INTERVAL_SECONDS'], 'pending-booking-sweeper')
+if app.config['BOOKING_LIFECYCLE_INTERVAL_SECONDS']:
+    start_periodic_job(app, complete_past_bookings, app.config['BOOKING_LIFECYCLE_INTERVAL_SECONDS'], 'booking-lifecycle')
+if app.config['ANALYTICS_REFRESH_INTERVAL_SECONDS']:
+    start_periodic_job(app, refresh_analytics_job, app.config['ANALYTICS_REFRESH_INTERVAL_SECONDS'], 'analytics-snapshot')
 
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload: dict) -> bool:
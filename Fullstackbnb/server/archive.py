@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta
+import click
+from models import db, Booking, BookingArchive, ListingDailyOccupancy
+
+# Statuses that never change again, so the booking can leave the hot table
+ARCHIVE_STATUSES = ('completed', 'cancelled', 'rejected', 'expired')
+ARCHIVE_COLUMNS = ('id', 'user_id', 'listing_id', 'check_in', 'check_out', 'booking_status', 'total_price', 'created_at')
+
+
+def archive_bookings(older_than_days=365, batch_size=1000, now=None):
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=older_than_days)
+    total = 0
+    while True:
+        # Served by (booking_status, check_out); SKIP LOCKED leaves rows another
+        # worker is changing for the next run
+        ids = db.session.execute(
+            db.select(Booking.id).where(
+                Booking.booking_status.in_(ARCHIVE_STATUSES),
+                Booking.check_out < cutoff
+            ).order_by(Booking.id).limit(batch_size).with_for_update(skip_locked=True)
+        ).scalars().all()
+        if not ids:
+            break
+
+        columns = [getattr(Booking, column) for column in ARCHIVE_COLUMNS]
+        db.session.execute(db.insert(BookingArchive).from_select(
+            list(ARCHIVE_COLUMNS) + ['archived_at'],
+            db.select(*columns, db.literal(now, db.DateTime)).where(Booking.id.in_(ids))
+        ))
+        # Occupied nights stay in the rollup, only their link to the moved
+        # row is dropped so the cascade from bookings leaves them alone
+        db.session.execute(
+            db.update(ListingDailyOccupancy).where(ListingDailyOccupancy.booking_id.in_(ids)).values(booking_id=None),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.execute(
+            db.delete(Booking).where(Booking.id.in_(ids)),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        total += len(ids)
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+@click.command('archive-bookings')
+@click.option('--older-than-days', default=365, show_default=True, help='Archive bookings that checked out before this many days ago.')
+@click.option('--batch-size', default=1000, show_default=True, help='Rows moved per transaction.')
+def archive_bookings_command(older_than_days, batch_size):
+    """Move finished bookings past the cutoff into bookings_archive."""
+    count = archive_bookings(older_than_days=older_than_days, batch_size=batch_size)
+    click.echo(f"Archived {count} bookings")
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+from bisect import bisect_left
+from threading import Lock
+import time
+from flask import current_app
+from models import db, Booking, CalendarBlock, BookingHold
+
+# Statuses that no longer hold the listing's dates
+RELEASED_STATUSES = ['cancelled', 'rejected', 'expired']
+
+
+def pending_cutoff(now=None):
+    ttl = current_app.config.get('PENDING_BOOKING_TTL_HOURS', 48)
+    return (now or datetime.utcnow()) - timedelta(hours=ttl)
+
+
+def is_pending_expired(booking, now=None):
+    if booking.booking_status != 'pending':
+        return False
+    return booking.created_at is None or booking.created_at < pending_cutoff(now)
+
+
+def blocking_filter(now=None):
+    # Pending requests past their hold TTL stop blocking dates right away,
+    # even before the sweeper has flipped them to 'expired'
+    return db.and_(
+        Booking.booking_status.notin_(RELEASED_STATUSES),
+        db.or_(
+            Booking.booking_status != 'pending',
+            Booking.created_at >= pending_cutoff(now)
+        )
+    )
+
+
+def overlapping_bookings(listing_id, check_in, check_out):
+    return db.select(Booking.id).where(
+        Booking.listing_id == listing_id,
+        Booking.check_out > check_in,
+        Booking.check_in < check_out,
+        blocking_filter()
+    )
+
+
+def overlapping_blocks(listing_id, check_in, check_out):
+    return db.select(CalendarBlock.id).where(
+        CalendarBlock.listing_id == listing_id,
+        CalendarBlock.end_date > check_in,
+        CalendarBlock.start_date < check_out,
+        CalendarBlock.blocked.is_(True)
+    )
+
+
+def overlapping_holds(listing_id, check_in, check_out, user_id=None):
+    query = db.select(BookingHold.id).where(
+        BookingHold.listing_id == listing_id,
+        BookingHold.check_out > check_in,
+        BookingHold.check_in < check_out,
+        BookingHold.expires_at > datetime.utcnow()
+    )
+    if user_id is not None:
+        # A guest's own hold never blocks them from booking those dates
+        query = query.where(BookingHold.user_id != user_id)
+    return query
+
+
+def is_range_blocked(listing_id, check_in, check_out, user_id=None):
+    # Bookings, calendar blocks and checkout holds are checked in one round
+    # trip, each side served by its (listing_id, start, end) index
+    return db.session.query(db.or_(
+        overlapping_bookings(listing_id, check_in, check_out).exists(),
+        overlapping_blocks(listing_id, check_in, check_out).exists(),
+        overlapping_holds(listing_id, check_in, check_out, user_id).exists()
+    )).scalar()
+
+
+def stay_price(listing, check_in, check_out):
+    # Nights under a host price override cost the override, the others the
+    # listing's price_per_night. Host ranges never overlap one another.
+    nights = (check_out - check_in).days
+    if nights <= 0:
+        return 0
+    base_price = listing.price_per_night or 0
+    overrides = db.session.query(
+        CalendarBlock.start_date, CalendarBlock.end_date, CalendarBlock.nightly_price
+    ).filter(
+        CalendarBlock.listing_id == listing.id,
+        CalendarBlock.end_date > check_in,
+        CalendarBlock.start_date < check_out,
+        CalendarBlock.source == 'host',
+        CalendarBlock.nightly_price.isnot(None)
+    )
+    total = base_price * nights
+    for start_date, end_date, nightly_price in overrides:
+        covered = (min(end_date, check_out) - max(start_date, check_in)).days
+        total += (nightly_price - base_price) * covered
+    return total
+
+
+def release_holds(listing_id, user_id):
+    # Called in the same transaction that creates the guest's booking
+    BookingHold.query.filter_by(listing_id=listing_id, user_id=user_id).delete()
+
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def overlaps_any(merged, starts, start, end):
+    # merged is sorted and disjoint, so only the last interval starting
+    # before ``end`` can overlap [start, end)
+    index = bisect_left(starts, end) - 1
+    return index >= 0 and merged[index][1] > start
+
+
+def as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+class ListingSnapshot:
+    def __init__(self, busy, holds, loaded_at, today):
+        self.busy = merge_intervals(busy)
+        self.starts = [interval[0] for interval in self.busy]
+        self.holds = holds  # (check_in, check_out, expires_at, user_id)
+        self.loaded_at = loaded_at
+        self.today = today
+
+    def is_blocked(self, check_in, check_out, now, user_id=None):
+        if overlaps_any(self.busy, self.starts, check_in, check_out):
+            return True
+        for hold_in, hold_out, expires_at, hold_user_id in self.holds:
+            if expires_at <= now or hold_user_id == user_id:
+                continue
+            if hold_in < check_out and hold_out > check_in:
+                return True
+        return False
+
+
+# Per-listing busy intervals (bookings, blocks and holds) kept in memory.
+# Snapshots cover today onwards and are reloaded after
+# AVAILABILITY_CACHE_SECONDS, so holds and bookings written by other workers
+# show up within that window, while writes on this worker invalidate the
+# listing straight away. Booking creation always re-checks the database.
+class AvailabilityCache:
+    def __init__(self):
+        self.snapshots = {}
+        self.lock = Lock()
+
+    def load(self, listing_id, today):
+        bookings = db.session.query(Booking.check_in, Booking.check_out).filter(
+            Booking.listing_id == listing_id,
+            Booking.check_out > today,
+            blocking_filter()
+        ).all()
+        blocks = db.session.query(CalendarBlock.start_date, CalendarBlock.end_date).filter(
+            CalendarBlock.listing_id == listing_id,
+            CalendarBlock.end_date > today,
+            CalendarBlock.blocked.is_(True)
+        ).all()
+        holds = db.session.query(
+            BookingHold.check_in, BookingHold.check_out, BookingHold.expires_at, BookingHold.user_id
+        ).filter(
+            BookingHold.listing_id == listing_id,
+            BookingHold.check_out > today,
+            BookingHold.expires_at > datetime.utcnow()
+        ).all()
+        busy = [(as_date(start), as_date(end)) for start, end in list(bookings) + list(blocks)]
+        return ListingSnapshot(busy, [tuple(hold) for hold in holds], time.monotonic(), today)
+
+    def get(self, listing_id):
+        ttl = current_app.config.get('AVAILABILITY_CACHE_SECONDS', 15)
+        today = datetime.utcnow().date()
+        with self.lock:
+            snapshot = self.snapshots.get(listing_id)
+        if snapshot and snapshot.today == today and time.monotonic() - snapshot.loaded_at < ttl:
+            return snapshot
+        snapshot = self.load(listing_id, today)
+        with self.lock:
+            self.snapshots[listing_id] = snapshot
+        return snapshot
+
+    def is_blocked(self, listing_id, check_in, check_out, user_id=None):
+        # Snapshots only know about today onwards, past ranges go to the database
+        if check_in < datetime.utcnow().date():
+            return is_range_blocked(listing_id, check_in, check_out, user_id)
+        return self.get(listing_id).is_blocked(check_in, check_out, datetime.utcnow(), user_id)
+
+    def invalidate(self, listing_id=None):
+        with self.lock:
+            if listing_id is None:
+                self.snapshots.clear()
+            else:
+                self.snapshots.pop(listing_id, None)
+
+
+availability_cache = AvailabilityCache()
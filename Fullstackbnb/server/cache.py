@@ -0,0 +1,57 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+# Small per-process cache for computed responses. Each worker keeps its own
+# copy, so entries expire after ``ttl`` seconds to pick up writes made by
+# other workers, and are invalidated straight away on local writes. With
+# ``max_entries`` set, the least recently used entry is dropped once the
+# cache is full, for keys the client picks.
+class TTLCache:
+    def __init__(self, ttl, max_entries=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            if self.max_entries is not None:
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+    def invalidate_group(self, group):
+        # Drops every tuple key whose first element is ``group``
+        with self.lock:
+            for key in [key for key in self.entries if isinstance(key, tuple) and key[0] == group]:
+                del self.entries[key]
+
+
+host_dashboard_cache = TTLCache(ttl=300)
+# Keyed by (listing_id, from, to), invalidated per listing when its stays
+# change. The dates come from the client, hence the size cap.
+listing_insights_cache = TTLCache(ttl=900, max_entries=2048)
+# This worker's copy of the analytics_snapshot row
+analytics_snapshot_cache = TTLCache(ttl=60)
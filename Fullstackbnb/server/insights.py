@@ -0,0 +1,80 @@
+import numpy as np
+from models import db, Booking, BookingArchive
+from occupancy import OCCUPIED_STATUSES, EPOCH, as_date
+
+# Histogram buckets as (label, lower bound in days, upper bound exclusive)
+LEAD_TIME_BUCKETS = (
+    ('0-1', 0, 2), ('2-7', 2, 8), ('8-30', 8, 31), ('31-90', 31, 91), ('91+', 91, None)
+)
+LENGTH_OF_STAY_BUCKETS = (
+    ('1', 1, 2), ('2', 2, 3), ('3', 3, 4), ('4-6', 4, 7), ('7-13', 7, 14), ('14-27', 14, 28), ('28+', 28, None)
+)
+
+
+def day_numbers(values):
+    return np.array([(as_date(value) - EPOCH).days for value in values], dtype=np.int64)
+
+
+def distribution(values, buckets):
+    counts = []
+    for label, low, high in buckets:
+        mask = values >= low if high is None else (values >= low) & (values < high)
+        counts.append({'bucket': label, 'count': int(mask.sum())})
+    return {
+        'buckets': counts,
+        'mean': float(values.mean()) if len(values) else None,
+        'median': float(np.median(values)) if len(values) else None
+    }
+
+
+def listing_insights(listing_id, start, end):
+    # One fetch of the occupied stays touching [start, end), archived ones
+    # included, everything else is vectorized over those columns
+    rows = db.session.execute(db.union_all(*[
+        db.select(model.check_in, model.check_out, model.total_price, model.created_at).where(
+            model.listing_id == listing_id,
+            model.booking_status.in_(OCCUPIED_STATUSES),
+            model.check_out > start,
+            model.check_in < end
+        ) for model in (Booking, BookingArchive)
+    ])).all()
+
+    window_start = (start - EPOCH).days
+    window_end = (end - EPOCH).days
+    available_nights = window_end - window_start
+
+    check_ins = day_numbers([row[0] for row in rows])
+    check_outs = day_numbers([row[1] for row in rows])
+    prices = np.array([row[2] or 0 for row in rows], dtype=np.float64)
+    nights = check_outs - check_ins
+    valid = nights > 0
+    created = day_numbers([row[3] or row[0] for row in rows])
+    has_created = np.array([row[3] is not None for row in rows], dtype=bool)
+    check_ins, check_outs, prices, nights, created, has_created = (
+        check_ins[valid], check_outs[valid], prices[valid], nights[valid], created[valid], has_created[valid]
+    )
+
+    # Stays crossing the window edges only count the nights inside it, with
+    # revenue spread evenly over the stay's nights
+    nights_in_window = np.clip(np.minimum(check_outs, window_end) - np.maximum(check_ins, window_start), 0, None)
+    revenue = float((prices / nights * nights_in_window).sum()) if len(nights) else 0.0
+    booked_nights = int(nights_in_window.sum())
+
+    # Lead time and length of stay describe bookings arriving in the window
+    arriving = check_ins >= window_start
+    lead_times = np.maximum(check_ins - created, 0)[arriving & has_created]
+
+    return {
+        'listing_id': listing_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'available_nights': available_nights,
+        'booked_nights': booked_nights,
+        'bookings': int(arriving.sum()),
+        'revenue': revenue,
+        'occupancy_rate': booked_nights / available_nights,
+        'average_daily_rate': revenue / booked_nights if booked_nights else None,
+        'revpar': revenue / available_nights,
+        'lead_time_days': distribution(lead_times, LEAD_TIME_BUCKETS),
+        'length_of_stay_nights': distribution(nights[arriving], LENGTH_OF_STAY_BUCKETS)
+    }
@@ -0,0 +1,164 @@
+import threading
+import time
+import click
+from collections import Counter
+from datetime import datetime
+from models import db, Booking, BookingHold, Listing
+from availability import pending_cutoff, availability_cache
+from cache import host_dashboard_cache
+
+
+def start_periodic_job(app, job, interval, name):
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    count = job()
+                    if count:
+                        app.logger.info("%s touched %s rows", name, count)
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("%s failed", name)
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+# Names of the one-off background jobs running in this worker
+running_jobs = set()
+running_jobs_lock = threading.Lock()
+
+
+def start_background_job(app, job, name):
+    # Runs ``job`` once off the request that asked for it, unless a run with
+    # the same name is still going in this worker
+    with running_jobs_lock:
+        if name in running_jobs:
+            return None
+        running_jobs.add(name)
+
+    def run():
+        with app.app_context():
+            try:
+                job()
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("%s failed", name)
+            finally:
+                db.session.remove()
+                with running_jobs_lock:
+                    running_jobs.discard(name)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+# ========== Expire stale pending bookings =========
+def expire_pending_bookings(batch_size=500, now=None):
+    cutoff = pending_cutoff(now)
+    total = 0
+    while True:
+        # SKIP LOCKED lets several workers sweep at once without waiting on
+        # each other's batches (it is a no-op on SQLite)
+        batch = db.select(Booking.id).where(
+            Booking.booking_status == 'pending',
+            db.or_(Booking.created_at < cutoff, Booking.created_at.is_(None))
+        ).limit(batch_size).with_for_update(skip_locked=True)
+
+        result = db.session.execute(
+            db.update(Booking)
+            .where(Booking.id.in_(batch), Booking.booking_status == 'pending')
+            .values(booking_status='expired'),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            break
+
+    if total:
+        availability_cache.invalidate()
+        host_dashboard_cache.invalidate()
+    return total
+
+
+# ========== Purge expired checkout holds =========
+def purge_expired_holds(now=None):
+    # Expired holds already stop blocking dates, this only keeps the table small
+    result = db.session.execute(
+        db.delete(BookingHold).where(BookingHold.expires_at <= (now or datetime.utcnow())),
+        execution_options={'synchronize_session': False}
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def sweep_stale_reservations():
+    return expire_pending_bookings() + purge_expired_holds()
+
+
+# ========== Complete confirmed bookings after checkout =========
+def complete_past_bookings(batch_size=500, now=None):
+    now = now or datetime.utcnow()
+    total = 0
+    while True:
+        batch = db.select(Booking.id).where(
+            Booking.booking_status == 'confirmed',
+            Booking.check_out <= now
+        ).limit(batch_size).with_for_update(skip_locked=True)
+
+        # RETURNING only yields rows this worker actually flipped, so the
+        # counters stay right when several workers run the job at once
+        completed = db.session.execute(
+            db.update(Booking)
+            .where(Booking.id.in_(batch), Booking.booking_status == 'confirmed')
+            .values(booking_status='completed')
+            .returning(Booking.listing_id),
+            execution_options={'synchronize_session': False}
+        ).scalars().all()
+
+        per_listing = Counter(completed)
+        if per_listing:
+            listings = Listing.__table__
+            db.session.execute(
+                listings.update()
+                .where(listings.c.id == db.bindparam('listing_id'))
+                .values(completed_stays=listings.c.completed_stays + db.bindparam('stays')),
+                [{'listing_id': listing_id, 'stays': stays} for listing_id, stays in per_listing.items()]
+            )
+        db.session.commit()
+        total += len(completed)
+        if len(completed) < batch_size:
+            break
+
+    if total:
+        host_dashboard_cache.invalidate()
+    return total
+
+
+@click.command('expire-pending-bookings')
+@click.option('--batch-size', default=500, show_default=True, help='Rows updated per transaction.')
+def expire_pending_bookings_command(batch_size):
+    """Mark pending bookings older than the hold TTL as expired."""
+    count = expire_pending_bookings(batch_size=batch_size)
+    click.echo(f"Expired {count} pending bookings")
+
+
+@click.command('complete-past-bookings')
+@click.option('--batch-size', default=500, show_default=True, help='Rows updated per transaction.')
+def complete_past_bookings_command(batch_size):
+    """Move confirmed bookings whose check-out has passed to completed."""
+    count = complete_past_bookings(batch_size=batch_size)
+    click.echo(f"Completed {count} bookings")
+
+
+@click.command('purge-expired-holds')
+def purge_expired_holds_command():
+    """Delete checkout holds that have run out."""
+    count = purge_expired_holds()
+    click.echo(f"Purged {count} expired holds")
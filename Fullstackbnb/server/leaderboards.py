@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+import click
+from sqlalchemy.exc import IntegrityError
+from models import db, Booking, BookingArchive, Listing, Review, LeaderboardDaily, LeaderboardScore
+from occupancy import as_date, as_day
+from ledger import EARNING_STATUSES
+from cache import TTLCache
+
+# Trailing window in days per period, None for all time
+LEADERBOARD_PERIODS = {'all': None, '30d': 30, '365d': 365}
+LEADERBOARD_METRICS = ('revenue', 'bookings', 'rating')
+LEADERBOARD_ENTITIES = {'hosts': 'host', 'listings': 'listing'}
+# Rating boards only rank entities with at least this many reviews
+LEADERBOARD_MIN_REVIEWS = 3
+STAT_COLUMNS = ('revenue', 'bookings', 'rating_sum', 'rating_count')
+
+# The day this worker's analytics job last re-derived the trailing boards
+windows_refreshed = TTLCache(ttl=86400)
+
+
+def window_start(period, today=None):
+    days = LEADERBOARD_PERIODS[period]
+    if days is None:
+        return None
+    return (today or datetime.utcnow().date()) - timedelta(days=days - 1)
+
+
+def increment(table, key, amounts):
+    # UPDATE, else INSERT in a savepoint, else UPDATE the row another
+    # transaction inserted first
+    condition = db.and_(*[table.c[column] == value for column, value in key.items()])
+    values = {column: table.c[column] + amount for column, amount in amounts.items()}
+    if db.session.execute(table.update().where(condition).values(**values)).rowcount:
+        return condition
+    try:
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(**key, **amounts))
+    except IntegrityError:
+        db.session.execute(table.update().where(condition).values(**values))
+    return condition
+
+
+def adjust_leaderboards(listing_id, host_id, day, **amounts):
+    daily = LeaderboardDaily.__table__
+    scores = LeaderboardScore.__table__
+    today = datetime.utcnow().date()
+    for entity_type, entity_id in (('listing', listing_id), ('host', host_id)):
+        increment(daily, {'entity_type': entity_type, 'entity_id': entity_id, 'date': day}, amounts)
+        for period in LEADERBOARD_PERIODS:
+            start = window_start(period, today)
+            if start is not None and day < start:
+                continue
+            condition = increment(scores, {'entity_type': entity_type, 'period': period, 'entity_id': entity_id}, amounts)
+            if 'rating_count' in amounts:
+                db.session.execute(scores.update().where(condition).values(
+                    rating=db.cast(scores.c.rating_sum, db.Float) / db.func.nullif(scores.c.rating_count, 0)
+                ))
+
+
+def sync_leaderboards(booking, previous_status):
+    # Call before committing a status change so the boards move with it
+    was_earning = previous_status in EARNING_STATUSES
+    is_earning = booking.booking_status in EARNING_STATUSES
+    if was_earning == is_earning:
+        return
+    sign = 1 if is_earning else -1
+    adjust_leaderboards(
+        booking.listing_id, booking.listing.user_id, as_date(booking.created_at or booking.check_in),
+        revenue=sign * (booking.total_price or 0), bookings=sign
+    )
+
+
+def record_review_change(review, rating_delta, count_delta):
+    # Call before committing a review write: (rating, 1) for a new review,
+    # (-rating, -1) for a deleted one
+    listing = review.listing or db.session.get(Listing, review.listing_id)
+    adjust_leaderboards(
+        review.listing_id, listing.user_id, as_date(review.created_at or datetime.utcnow()),
+        rating_sum=rating_delta, rating_count=count_delta
+    )
+
+
+def daily_rows(host_ids=None):
+    # Recomputes the per-day stats from bookings, archived bookings and
+    # reviews, for every listing of ``host_ids`` or for all of them
+    rows = {}
+
+    def add(entity_type, entity_id, day, **amounts):
+        row = rows.setdefault((entity_type, entity_id, day), dict.fromkeys(STAT_COLUMNS, 0))
+        for column, amount in amounts.items():
+            row[column] += amount
+
+    queries = []
+    for model in (Booking, BookingArchive):
+        day = db.func.date(db.func.coalesce(model.created_at, model.check_in))
+        queries.append((db.session.query(
+            model.listing_id, Listing.user_id, day,
+            db.func.coalesce(db.func.sum(model.total_price), 0), db.func.count(model.id), db.literal(0), db.literal(0)
+        ).join(Listing, model.listing_id == Listing.id).filter(
+            model.booking_status.in_(EARNING_STATUSES)
+        ).group_by(model.listing_id, Listing.user_id, day)))
+    review_day = db.func.date(Review.created_at)
+    queries.append(db.session.query(
+        Review.listing_id, Listing.user_id, review_day,
+        db.literal(0), db.literal(0), db.func.sum(Review.rating), db.func.count(Review.id)
+    ).join(Listing, Review.listing_id == Listing.id).filter(
+        Review.created_at.isnot(None)
+    ).group_by(Review.listing_id, Listing.user_id, review_day))
+
+    for query in queries:
+        if host_ids is not None:
+            query = query.filter(Listing.user_id.in_(host_ids))
+        for listing_id, host_id, day, revenue, bookings, rating_sum, rating_count in query:
+            amounts = {'revenue': revenue, 'bookings': bookings, 'rating_sum': rating_sum, 'rating_count': rating_count}
+            add('listing', listing_id, as_day(day), **amounts)
+            add('host', host_id, as_day(day), **amounts)
+    return rows
+
+
+def entity_condition(table, entities):
+    # entities maps entity_type to a list of ids, None means every row
+    if entities is None:
+        return db.true()
+    return db.or_(*[
+        db.and_(table.c.entity_type == entity_type, table.c.entity_id.in_(ids))
+        for entity_type, ids in entities.items() if ids
+    ], db.false())
+
+
+def derive_scores(periods, entities=None):
+    # Re-sums leaderboard_scores from leaderboard_daily for the periods given
+    daily = LeaderboardDaily.__table__
+    scores = LeaderboardScore.__table__
+    today = datetime.utcnow().date()
+    for period in periods:
+        db.session.execute(scores.delete().where(scores.c.period == period, entity_condition(scores, entities)))
+        query = db.select(
+            daily.c.entity_type, db.literal(period), daily.c.entity_id,
+            *[db.func.sum(daily.c[column]) for column in STAT_COLUMNS],
+            db.cast(db.func.sum(daily.c.rating_sum), db.Float) / db.func.nullif(db.func.sum(daily.c.rating_count), 0)
+        ).where(entity_condition(daily, entities)).group_by(daily.c.entity_type, daily.c.entity_id)
+        start = window_start(period, today)
+        if start is not None:
+            query = query.where(daily.c.date >= start)
+        db.session.execute(scores.insert().from_select(
+            ['entity_type', 'period', 'entity_id'] + list(STAT_COLUMNS) + ['rating'], query
+        ))
+
+
+def rebuild_leaderboards(host_ids=None):
+    # Everything, or ``host_ids`` and all of their listings. Call after the
+    # change (e.g. a delete) has been flushed
+    daily = LeaderboardDaily.__table__
+    entities = None
+    if host_ids is not None:
+        host_ids = list(host_ids)
+        listing_ids = [row[0] for row in db.session.query(Listing.id).filter(Listing.user_id.in_(host_ids))]
+        entities = {'host': host_ids, 'listing': listing_ids}
+    rows = daily_rows(host_ids)
+    db.session.execute(daily.delete().where(entity_condition(daily, entities)))
+    if rows:
+        db.session.execute(daily.insert(), [
+            dict(amounts, entity_type=entity_type, entity_id=entity_id, date=day)
+            for (entity_type, entity_id, day), amounts in rows.items()
+        ])
+    derive_scores(LEADERBOARD_PERIODS, entities)
+    return len(rows)
+
+
+def remove_from_leaderboards(listing_ids, host_ids=()):
+    # For deleted listings and hosts, whose rows nothing else would clear
+    entities = {'listing': list(listing_ids), 'host': list(host_ids)}
+    for table in (LeaderboardDaily.__table__, LeaderboardScore.__table__):
+        db.session.execute(table.delete().where(entity_condition(table, entities)))
+
+
+def refresh_trailing_leaderboards():
+    # Drops the days that have left the 30 and 365 day windows
+    derive_scores([period for period, days in LEADERBOARD_PERIODS.items() if days])
+    db.session.commit()
+    windows_refreshed.set('trailing', datetime.utcnow().date())
+
+
+def ensure_trailing_leaderboards():
+    # Once a day from the analytics job, never from a request
+    if windows_refreshed.get('trailing') != datetime.utcnow().date():
+        refresh_trailing_leaderboards()
+
+
+def top_entries(entity_type, metric, period, limit):
+    # An index range read on (entity_type, period, metric)
+    column = getattr(LeaderboardScore, metric)
+    query = LeaderboardScore.query.filter(
+        LeaderboardScore.entity_type == entity_type,
+        LeaderboardScore.period == period
+    )
+    if metric == 'rating':
+        query = query.filter(LeaderboardScore.rating_count >= LEADERBOARD_MIN_REVIEWS)
+    else:
+        query = query.filter(column > 0)
+    return query.order_by(column.desc(), LeaderboardScore.entity_id).limit(limit).all()
+
+
+@click.command('rebuild-leaderboards')
+@click.option('--trailing', is_flag=True, help='Only drop expired days from the 30 and 365 day boards.')
+def rebuild_leaderboards_command(trailing):
+    """Recompute the leaderboard tables from bookings and reviews."""
+    if trailing:
+        refresh_trailing_leaderboards()
+        click.echo("Trailing leaderboards re-derived")
+        return
+    rows = rebuild_leaderboards()
+    db.session.commit()
+    windows_refreshed.invalidate()
+    click.echo(f"Rebuilt leaderboards from {rows} daily rows")
@@ -0,0 +1,119 @@
+from datetime import date
+import click
+from sqlalchemy.exc import IntegrityError
+from models import db, Booking, BookingArchive, Listing, HostEarnings
+from occupancy import OCCUPIED_STATUSES
+
+# Statuses whose total_price counts towards a host's earnings
+EARNING_STATUSES = OCCUPIED_STATUSES
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def adjust_earnings(host_id, listing_id, month, amount, count):
+    table = HostEarnings.__table__
+    key = db.and_(table.c.host_id == host_id, table.c.listing_id == listing_id, table.c.month == month)
+    result = db.session.execute(table.update().where(key).values(
+        earnings=table.c.earnings + amount,
+        bookings=table.c.bookings + count
+    ))
+    if result.rowcount:
+        return
+    try:
+        # Another transaction may create the same row first, in which case
+        # the savepoint rolls back and the increment is applied to theirs
+        with db.session.begin_nested():
+            db.session.execute(table.insert().values(
+                host_id=host_id, listing_id=listing_id, month=month, earnings=amount, bookings=count
+            ))
+    except IntegrityError:
+        db.session.execute(table.update().where(key).values(
+            earnings=table.c.earnings + amount,
+            bookings=table.c.bookings + count
+        ))
+
+
+def sync_host_earnings(booking, previous_status):
+    # Call before committing a status change so the ledger moves with it
+    was_earning = previous_status in EARNING_STATUSES
+    is_earning = booking.booking_status in EARNING_STATUSES
+    if was_earning == is_earning:
+        return
+    sign = 1 if is_earning else -1
+    adjust_earnings(
+        booking.listing.user_id, booking.listing_id, month_start(booking.check_in),
+        sign * (booking.total_price or 0), sign
+    )
+
+
+def recompute_earnings(listing_ids=None):
+    # Archived bookings keep counting, so both tables are summed
+    expected = {}
+    for model in (Booking, BookingArchive):
+        year = db.extract('year', model.check_in)
+        month = db.extract('month', model.check_in)
+        query = db.session.query(
+            Listing.user_id, model.listing_id, year, month,
+            db.func.coalesce(db.func.sum(model.total_price), 0), db.func.count(model.id)
+        ).join(Listing, model.listing_id == Listing.id).filter(
+            model.booking_status.in_(EARNING_STATUSES)
+        ).group_by(Listing.user_id, model.listing_id, year, month)
+        if listing_ids is not None:
+            query = query.filter(model.listing_id.in_(listing_ids))
+        for host_id, listing_id, booking_year, booking_month, earnings, count in query:
+            key = (host_id, listing_id, date(int(booking_year), int(booking_month), 1))
+            total_earnings, total_count = expected.get(key, (0, 0))
+            expected[key] = (total_earnings + earnings, total_count + count)
+    return expected
+
+
+def rebuild_host_earnings(listing_ids=None):
+    table = HostEarnings.__table__
+    expected = recompute_earnings(listing_ids)
+    delete = table.delete()
+    if listing_ids is not None:
+        delete = delete.where(table.c.listing_id.in_(listing_ids))
+    db.session.execute(delete)
+    if expected:
+        db.session.execute(table.insert(), [{
+            'host_id': host_id, 'listing_id': listing_id, 'month': month,
+            'earnings': earnings, 'bookings': count
+        } for (host_id, listing_id, month), (earnings, count) in expected.items()])
+    return len(expected)
+
+
+def find_ledger_mismatches():
+    expected = recompute_earnings()
+    actual = {
+        (row.host_id, row.listing_id, row.month): (row.earnings, row.bookings)
+        for row in HostEarnings.query.all()
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        want = expected.get(key, (0, 0))
+        have = actual.get(key, (0, 0))
+        if abs(want[0] - have[0]) > 0.005 or want[1] != have[1]:
+            mismatches.append((key, want, have))
+    return mismatches
+
+
+@click.command('reconcile-host-earnings')
+@click.option('--fix', is_flag=True, help='Rebuild the ledger when it has drifted.')
+def reconcile_host_earnings_command(fix):
+    """Verify host_earnings against a full recomputation from bookings."""
+    mismatches = find_ledger_mismatches()
+    for (host_id, listing_id, month), want, have in mismatches:
+        click.echo(
+            f"host {host_id} listing {listing_id} {month:%Y-%m}: "
+            f"expected {want[0]:.2f} over {want[1]} bookings, ledger has {have[0]:.2f} over {have[1]}"
+        )
+    if not mismatches:
+        click.echo("host_earnings matches bookings")
+        return
+    if not fix:
+        raise click.ClickException(f"{len(mismatches)} ledger rows differ, rerun with --fix to rebuild")
+    rows = rebuild_host_earnings()
+    db.session.commit()
+    click.echo(f"Rebuilt host_earnings with {rows} rows")
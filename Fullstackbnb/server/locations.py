@@ -0,0 +1,131 @@
+import click
+from sqlalchemy.exc import IntegrityError
+from models import db, Listing, Location
+
+US_STATES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca',
+    'colorado': 'co', 'connecticut': 'ct', 'delaware': 'de', 'district of columbia': 'dc',
+    'florida': 'fl', 'georgia': 'ga', 'hawaii': 'hi', 'idaho': 'id', 'illinois': 'il',
+    'indiana': 'in', 'iowa': 'ia', 'kansas': 'ks', 'kentucky': 'ky', 'louisiana': 'la',
+    'maine': 'me', 'maryland': 'md', 'massachusetts': 'ma', 'michigan': 'mi', 'minnesota': 'mn',
+    'mississippi': 'ms', 'missouri': 'mo', 'montana': 'mt', 'nebraska': 'ne', 'nevada': 'nv',
+    'new hampshire': 'nh', 'new jersey': 'nj', 'new mexico': 'nm', 'new york': 'ny',
+    'north carolina': 'nc', 'north dakota': 'nd', 'ohio': 'oh', 'oklahoma': 'ok', 'oregon': 'or',
+    'pennsylvania': 'pa', 'rhode island': 'ri', 'south carolina': 'sc', 'south dakota': 'sd',
+    'tennessee': 'tn', 'texas': 'tx', 'utah': 'ut', 'vermont': 'vt', 'virginia': 'va',
+    'washington': 'wa', 'west virginia': 'wv', 'wisconsin': 'wi', 'wyoming': 'wy'
+}
+COUNTRY_SUFFIXES = ('usa', 'us', 'united states', 'united states of america')
+AUTOCOMPLETE_LIMIT = 10
+
+
+def canonical_location(value):
+    # "New York, New York, USA", "new york,ny" and "New York, NY" all become
+    # the key "new york, ny"; a value without a region keys on the city alone
+    parts = [' '.join(part.replace('.', '').lower().split()) for part in (value or '').split(',')]
+    parts = [part for part in parts if part]
+    if len(parts) > 2 and parts[-1] in COUNTRY_SUFFIXES:
+        parts = parts[:-1]
+    if not parts:
+        return None
+    city = parts[0][:100]
+    region = ', '.join(parts[1:])
+    region = US_STATES.get(region, region)[:50] or None
+    if region:
+        name = f"{city.title()}, {region.upper() if len(region) == 2 else region.title()}"
+    else:
+        name = city.title()
+    return {'key': f"{city}, {region}" if region else city, 'city': city, 'region': region, 'name': name[:100]}
+
+
+def location_key(value):
+    location = canonical_location(value)
+    return location['key'] if location else None
+
+
+def resolve_locations(values):
+    # Maps raw location strings to location ids, creating the missing rows.
+    # A value without a region joins the only location already known for
+    # that city, so regions are resolved first
+    canonical = {value: canonical_location(value) for value in set(values)}
+    canonical = {value: location for value, location in canonical.items() if location}
+    cities = {location['city'] for location in canonical.values()}
+    known = {}
+    for location in Location.query.filter(Location.city.in_(cities)) if cities else ():
+        known.setdefault(location.city, {})[location.key] = location.id
+
+    resolved = {}
+    for value, location in sorted(canonical.items(), key=lambda item: item[1]['region'] is None):
+        by_key = known.setdefault(location['city'], {})
+        if location['region'] is None and location['key'] not in by_key and len(by_key) == 1:
+            resolved[value] = next(iter(by_key.values()))
+            continue
+        if location['key'] not in by_key:
+            by_key[location['key']] = create_location(location)
+            # The city's first region takes over its bare-city row, as if the
+            # spellings had arrived the other way round
+            if location['region'] and location['city'] in by_key and len(by_key) == 2:
+                if merge_location(by_key[location['city']], by_key[location['key']]):
+                    del by_key[location['city']]
+        resolved[value] = by_key[location['key']]
+    return resolved
+
+
+def create_location(location):
+    try:
+        # Another request may add the same key first, then theirs is used
+        with db.session.begin_nested():
+            row = Location(**location)
+            db.session.add(row)
+        return row.id
+    except IntegrityError:
+        return db.session.query(Location.id).filter_by(key=location['key']).scalar()
+
+
+def merge_location(from_id, to_id):
+    db.session.execute(db.update(Listing).where(Listing.location_id == from_id).values(location_id=to_id))
+    try:
+        # A listing saved against the old row meanwhile keeps it alive
+        with db.session.begin_nested():
+            db.session.execute(db.delete(Location).where(Location.id == from_id))
+        return True
+    except IntegrityError:
+        return False
+
+
+def location_ids_for(value):
+    # Ids matching a search term: the exact canonical location, or every
+    # region of a city when the term has no region
+    location = canonical_location(value)
+    if not location:
+        return []
+    if location['region']:
+        return [row[0] for row in db.session.query(Location.id).filter_by(key=location['key'])]
+    return [row[0] for row in db.session.query(Location.id).filter_by(city=location['city'])]
+
+
+def autocomplete_locations(prefix, limit=AUTOCOMPLETE_LIMIT):
+    key = ' '.join(prefix.replace('.', '').lower().split())
+    escaped = key.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return Location.query.filter(Location.key.like(f'{escaped}%', escape='\\')).order_by(Location.key).limit(limit).all()
+
+
+def backfill_listing_locations(reassign=False):
+    query = db.session.query(Listing.location).distinct()
+    if not reassign:
+        query = query.filter(Listing.location_id.is_(None))
+    values = [row[0] for row in query]
+    resolved = resolve_locations(values)
+    # One UPDATE per distinct spelling rather than per listing
+    for value, location_id in resolved.items():
+        db.session.execute(db.update(Listing).where(Listing.location == value).values(location_id=location_id))
+    db.session.commit()
+    return len(resolved)
+
+
+@click.command('backfill-locations')
+@click.option('--all', 'reassign', is_flag=True, help='Re-resolve every listing, not only those without a location.')
+def backfill_locations_command(reassign):
+    """Link listings to canonical rows in the locations table."""
+    spellings = backfill_listing_locations(reassign)
+    click.echo(f"Resolved {spellings} location spellings")
@@ -0,0 +1,28 @@
+"""calendar price overrides
+
+Revision ID: 1b7e5d9c3f86
+Revises: f2c87d1e4a30
+Create Date: 2025-07-17 09:48:13.604129
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b7e5d9c3f86'
+down_revision = 'f2c87d1e4a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('calendar_blocks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blocked', sa.Boolean(), server_default=sa.true(), nullable=False))
+        batch_op.add_column(sa.Column('nightly_price', sa.Float(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('calendar_blocks', schema=None) as batch_op:
+        batch_op.drop_column('nightly_price')
+        batch_op.drop_column('blocked')
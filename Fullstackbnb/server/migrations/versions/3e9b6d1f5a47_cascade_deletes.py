@@ -0,0 +1,68 @@
+"""cascade deletes
+
+Revision ID: 3e9b6d1f5a47
+Revises: b5e1f7a2c963
+Create Date: 2025-07-23 16:48:21.390562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e9b6d1f5a47'
+down_revision = 'b5e1f7a2c963'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table) for every foreign key to users, listings
+# and bookings
+FOREIGN_KEYS = [
+    ('listings', 'user_id', 'users'),
+    ('bookings', 'user_id', 'users'),
+    ('bookings', 'listing_id', 'listings'),
+    ('favorites', 'user_id', 'users'),
+    ('favorites', 'listing_id', 'listings'),
+    ('reviews', 'user_id', 'users'),
+    ('reviews', 'listing_id', 'listings'),
+    ('calendar_blocks', 'listing_id', 'listings'),
+    ('booking_holds', 'listing_id', 'listings'),
+    ('booking_holds', 'user_id', 'users'),
+    ('listing_daily_occupancy', 'listing_id', 'listings'),
+    ('listing_daily_occupancy', 'booking_id', 'bookings'),
+    ('host_earnings', 'host_id', 'users'),
+    ('host_earnings', 'listing_id', 'listings'),
+]
+
+# Gives the unnamed constraints SQLite reflects a name batch mode can drop
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def replace_foreign_keys(ondelete):
+    inspector = sa.inspect(op.get_bind())
+    tables = []
+    for table, _, _ in FOREIGN_KEYS:
+        if table not in tables:
+            tables.append(table)
+    for table in tables:
+        # Postgres named the original constraints <table>_<column>_fkey while
+        # SQLite left them unnamed, so drop whatever name is actually there
+        names = {
+            (fk['constrained_columns'][0], fk['referred_table']): fk['name']
+            for fk in inspector.get_foreign_keys(table)
+        }
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            for fk_table, column, referred in FOREIGN_KEYS:
+                if fk_table != table:
+                    continue
+                name = names.get((column, referred)) or f'fk_{table}_{column}_{referred}'
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(f'{table}_{column}_fkey', referred, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    replace_foreign_keys('CASCADE')
+
+
+def downgrade():
+    replace_foreign_keys(None)
@@ -0,0 +1,30 @@
+"""booking indexes
+
+Revision ID: 3f9a1c7d2e41
+Revises: 07d56c507fdf
+Create Date: 2025-07-02 10:14:52.418306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7d2e41'
+down_revision = '07d56c507fdf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_listing_id_check_in_check_out', ['listing_id', 'check_in', 'check_out'], unique=False)
+        batch_op.create_index('ix_bookings_user_id_check_in', ['user_id', 'check_in'], unique=False)
+        batch_op.create_index('ix_bookings_listing_id_booking_status', ['listing_id', 'booking_status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_listing_id_booking_status')
+        batch_op.drop_index('ix_bookings_user_id_check_in')
+        batch_op.drop_index('ix_bookings_listing_id_check_in_check_out')
@@ -0,0 +1,48 @@
+"""daily platform stats
+
+Revision ID: 4c8f1a3e7d29
+Revises: 9d4a2c6e8b15
+Create Date: 2025-07-19 10:37:52.081946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c8f1a3e7d29'
+down_revision = '9d4a2c6e8b15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_platform_stats',
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('new_users', sa.Integer(), nullable=False),
+    sa.Column('new_listings', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('date')
+    )
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_bookings_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_listings_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_created_at'))
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_listings_created_at'))
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_bookings_created_at'))
+
+    op.drop_table('daily_platform_stats')
@@ -0,0 +1,42 @@
+"""booking holds
+
+Revision ID: 5e0b93c7d4f2
+Revises: c41e7a95b2d8
+Create Date: 2025-07-07 09:26:15.734102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b93c7d4f2'
+down_revision = 'c41e7a95b2d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('booking_holds',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('listing_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('check_in', sa.Date(), nullable=False),
+    sa.Column('check_out', sa.Date(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['listing_id'], ['listings.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('booking_holds', schema=None) as batch_op:
+        batch_op.create_index('ix_booking_holds_listing_id_check_in_check_out', ['listing_id', 'check_in', 'check_out'], unique=False)
+        batch_op.create_index('ix_booking_holds_expires_at', ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('booking_holds', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_holds_expires_at')
+        batch_op.drop_index('ix_booking_holds_listing_id_check_in_check_out')
+
+    op.drop_table('booking_holds')
@@ -0,0 +1,37 @@
+"""location price stats
+
+Revision ID: 6f2b8d4e1a57
+Revises: 3e9b6d1f5a47
+Create Date: 2025-07-24 10:12:37.504826
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f2b8d4e1a57'
+down_revision = '3e9b6d1f5a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('location_price_stats',
+    sa.Column('location', sa.String(length=100), nullable=False),
+    sa.Column('display_name', sa.String(length=100), nullable=False),
+    sa.Column('listing_count', sa.Integer(), nullable=False),
+    sa.Column('min_price', sa.Float(), nullable=False),
+    sa.Column('median_price', sa.Float(), nullable=False),
+    sa.Column('p90_price', sa.Float(), nullable=False),
+    sa.Column('mean_price', sa.Float(), nullable=False),
+    sa.Column('max_price', sa.Float(), nullable=False),
+    sa.Column('histogram', sa.Text(), nullable=False),
+    sa.Column('outlier_listing_ids', sa.Text(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('location')
+    )
+
+
+def downgrade():
+    op.drop_table('location_price_stats')
@@ -0,0 +1,29 @@
+"""user search indexes
+
+Revision ID: 7a3d9e2b5c14
+Revises: 4c8f1a3e7d29
+Create Date: 2025-07-21 14:12:30.558207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3d9e2b5c14'
+down_revision = '4c8f1a3e7d29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # text_pattern_ops only exists on Postgres, where LIKE 'prefix%' needs it
+    # to use the index under a non-C collation
+    ops = ' text_pattern_ops' if op.get_bind().dialect.name == 'postgresql' else ''
+    op.create_index('ix_users_lower_username', 'users', [sa.text(f'lower(username){ops}')], unique=False)
+    op.create_index('ix_users_lower_email', 'users', [sa.text(f'lower(email){ops}')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_lower_email', table_name='users')
+    op.drop_index('ix_users_lower_username', table_name='users')
@@ -0,0 +1,26 @@
+"""pending expiry index
+
+Revision ID: 8b2d4e6f1a93
+Revises: 3f9a1c7d2e41
+Create Date: 2025-07-03 16:40:08.552917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4e6f1a93'
+down_revision = '3f9a1c7d2e41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_booking_status_created_at', ['booking_status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_booking_status_created_at')
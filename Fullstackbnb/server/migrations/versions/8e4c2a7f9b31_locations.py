@@ -0,0 +1,124 @@
+"""locations
+
+Revision ID: 8e4c2a7f9b31
+Revises: 6f2b8d4e1a57
+Create Date: 2025-07-24 15:37:08.912364
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4c2a7f9b31'
+down_revision = '6f2b8d4e1a57'
+branch_labels = None
+depends_on = None
+
+
+US_STATES = {
+    'alabama': 'al', 'alaska': 'ak', 'arizona': 'az', 'arkansas': 'ar', 'california': 'ca',
+    'colorado': 'co', 'connecticut': 'ct', 'delaware': 'de', 'district of columbia': 'dc',
+    'florida': 'fl', 'georgia': 'ga', 'hawaii': 'hi', 'idaho': 'id', 'illinois': 'il',
+    'indiana': 'in', 'iowa': 'ia', 'kansas': 'ks', 'kentucky': 'ky', 'louisiana': 'la',
+    'maine': 'me', 'maryland': 'md', 'massachusetts': 'ma', 'michigan': 'mi', 'minnesota': 'mn',
+    'mississippi': 'ms', 'missouri': 'mo', 'montana': 'mt', 'nebraska': 'ne', 'nevada': 'nv',
+    'new hampshire': 'nh', 'new jersey': 'nj', 'new mexico': 'nm', 'new york': 'ny',
+    'north carolina': 'nc', 'north dakota': 'nd', 'ohio': 'oh', 'oklahoma': 'ok', 'oregon': 'or',
+    'pennsylvania': 'pa', 'rhode island': 'ri', 'south carolina': 'sc', 'south dakota': 'sd',
+    'tennessee': 'tn', 'texas': 'tx', 'utah': 'ut', 'vermont': 'vt', 'virginia': 'va',
+    'washington': 'wa', 'west virginia': 'wv', 'wisconsin': 'wi', 'wyoming': 'wy'
+}
+COUNTRY_SUFFIXES = ('usa', 'us', 'united states', 'united states of america')
+
+
+def canonical_location(value):
+    # A copy of locations.canonical_location as of this revision, so later
+    # changes to the app's rules don't change what this migration does
+    parts = [' '.join(part.replace('.', '').lower().split()) for part in (value or '').split(',')]
+    parts = [part for part in parts if part]
+    if len(parts) > 2 and parts[-1] in COUNTRY_SUFFIXES:
+        parts = parts[:-1]
+    if not parts:
+        return None
+    city = parts[0][:100]
+    region = ', '.join(parts[1:])
+    region = US_STATES.get(region, region)[:50] or None
+    if region:
+        name = f"{city.title()}, {region.upper() if len(region) == 2 else region.title()}"
+    else:
+        name = city.title()
+    return {'key': f"{city}, {region}" if region else city, 'city': city, 'region': region, 'name': name[:100]}
+
+
+def backfill_locations():
+    # Same rules as locations.resolve_locations: spellings with a region are
+    # keyed first, then a bare city joins its only known region
+    bind = op.get_bind()
+    listings = sa.table('listings', sa.column('location', sa.String), sa.column('location_id', sa.Integer))
+    locations = sa.table(
+        'locations', sa.column('id', sa.Integer), sa.column('key', sa.String), sa.column('city', sa.String),
+        sa.column('region', sa.String), sa.column('name', sa.String)
+    )
+    values = [row[0] for row in bind.execute(sa.select(listings.c.location).distinct())]
+    canonical = {value: canonical_location(value) for value in values}
+    canonical = {value: location for value, location in canonical.items() if location}
+
+    rows = {}
+    for location in sorted(canonical.values(), key=lambda location: location['region'] is None):
+        if location['region'] is None:
+            regions = [row for row in rows.values() if row['city'] == location['city']]
+            if location['key'] not in rows and len(regions) == 1:
+                continue
+        rows.setdefault(location['key'], location)
+    if rows:
+        bind.execute(locations.insert(), list(rows.values()))
+    ids = {key: id for id, key in bind.execute(sa.select(locations.c.id, locations.c.key))}
+    cities = {}
+    for key, location in rows.items():
+        cities.setdefault(location['city'], []).append(ids[key])
+
+    for value, location in canonical.items():
+        location_id = ids.get(location['key']) or cities[location['city']][0]
+        bind.execute(listings.update().where(listings.c.location == value).values(location_id=location_id))
+
+
+def upgrade():
+    op.create_table('locations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=160), nullable=False),
+    sa.Column('city', sa.String(length=100), nullable=False),
+    sa.Column('region', sa.String(length=50), nullable=True),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('locations', schema=None) as batch_op:
+        batch_op.create_index('ix_locations_key', ['key'], unique=True, postgresql_ops={'key': 'text_pattern_ops'})
+        batch_op.create_index(batch_op.f('ix_locations_city'), ['city'], unique=False)
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('location_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_listings_location_id'), ['location_id'], unique=False)
+        batch_op.create_foreign_key('listings_location_id_fkey', 'locations', ['location_id'], ['id'])
+
+    backfill_locations()
+
+    # Price stats are now keyed on locations.key
+    with op.batch_alter_table('location_price_stats', schema=None) as batch_op:
+        batch_op.alter_column('location', existing_type=sa.String(length=100), type_=sa.String(length=160))
+
+
+def downgrade():
+    with op.batch_alter_table('location_price_stats', schema=None) as batch_op:
+        batch_op.alter_column('location', existing_type=sa.String(length=160), type_=sa.String(length=100))
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_constraint('listings_location_id_fkey', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_listings_location_id'))
+        batch_op.drop_column('location_id')
+
+    with op.batch_alter_table('locations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_locations_city'))
+        batch_op.drop_index('ix_locations_key')
+
+    op.drop_table('locations')
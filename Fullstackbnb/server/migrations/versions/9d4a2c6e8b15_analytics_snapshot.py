@@ -0,0 +1,33 @@
+"""analytics snapshot
+
+Revision ID: 9d4a2c6e8b15
+Revises: 1b7e5d9c3f86
+Create Date: 2025-07-18 15:21:09.733418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4a2c6e8b15'
+down_revision = '1b7e5d9c3f86'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('analytics_snapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_bookings', sa.Integer(), nullable=False),
+    sa.Column('total_revenue', sa.Float(), nullable=False),
+    sa.Column('active_listings', sa.Integer(), nullable=False),
+    sa.Column('total_users', sa.Integer(), nullable=False),
+    sa.Column('popular_locations', sa.Text(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('analytics_snapshot')
@@ -0,0 +1,54 @@
+"""leaderboards
+
+Revision ID: a6c9e3b7d418
+Revises: d3a7f1c5e862
+Create Date: 2025-07-25 14:05:51.648203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c9e3b7d418'
+down_revision = 'd3a7f1c5e862'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leaderboard_daily',
+    sa.Column('entity_type', sa.String(length=10), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('entity_type', 'entity_id', 'date')
+    )
+    op.create_table('leaderboard_scores',
+    sa.Column('entity_type', sa.String(length=10), nullable=False),
+    sa.Column('period', sa.String(length=10), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Integer(), nullable=False),
+    sa.Column('rating_count', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('entity_type', 'period', 'entity_id')
+    )
+    with op.batch_alter_table('leaderboard_scores', schema=None) as batch_op:
+        batch_op.create_index('ix_leaderboard_scores_bookings', ['entity_type', 'period', 'bookings'], unique=False)
+        batch_op.create_index('ix_leaderboard_scores_rating', ['entity_type', 'period', 'rating'], unique=False)
+        batch_op.create_index('ix_leaderboard_scores_revenue', ['entity_type', 'period', 'revenue'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('leaderboard_scores', schema=None) as batch_op:
+        batch_op.drop_index('ix_leaderboard_scores_revenue')
+        batch_op.drop_index('ix_leaderboard_scores_rating')
+        batch_op.drop_index('ix_leaderboard_scores_bookings')
+
+    op.drop_table('leaderboard_scores')
+    op.drop_table('leaderboard_daily')
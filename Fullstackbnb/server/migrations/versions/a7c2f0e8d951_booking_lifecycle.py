@@ -0,0 +1,32 @@
+"""booking lifecycle
+
+Revision ID: a7c2f0e8d951
+Revises: 5e0b93c7d4f2
+Create Date: 2025-07-09 14:51:43.208617
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2f0e8d951'
+down_revision = '5e0b93c7d4f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_booking_status_check_out', ['booking_status', 'check_out'], unique=False)
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('completed_stays', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_column('completed_stays')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_booking_status_check_out')
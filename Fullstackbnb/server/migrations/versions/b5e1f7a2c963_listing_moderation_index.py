@@ -0,0 +1,28 @@
+"""listing moderation index
+
+Revision ID: b5e1f7a2c963
+Revises: 7a3d9e2b5c14
+Create Date: 2025-07-22 09:05:44.917360
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1f7a2c963'
+down_revision = '7a3d9e2b5c14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The model default used to be 'Pending' while the views write 'pending',
+    # the partial index only covers the lowercase spelling
+    op.execute("UPDATE listings SET status = 'pending' WHERE status = 'Pending'")
+    op.create_index('ix_listings_pending_created_at', 'listings', ['created_at', 'id'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"), sqlite_where=sa.text("status = 'pending'"))
+
+
+def downgrade():
+    op.drop_index('ix_listings_pending_created_at', table_name='listings')
@@ -0,0 +1,41 @@
+"""calendar blocks
+
+Revision ID: c41e7a95b2d8
+Revises: 8b2d4e6f1a93
+Create Date: 2025-07-05 11:02:37.190844
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a95b2d8'
+down_revision = '8b2d4e6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calendar_blocks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('listing_id', sa.Integer(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('external_uid', sa.String(length=255), nullable=True),
+    sa.Column('summary', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['listing_id'], ['listings.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('listing_id', 'external_uid', name='uq_calendar_blocks_listing_id_external_uid')
+    )
+    with op.batch_alter_table('calendar_blocks', schema=None) as batch_op:
+        batch_op.create_index('ix_calendar_blocks_listing_id_start_date_end_date', ['listing_id', 'start_date', 'end_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('calendar_blocks', schema=None) as batch_op:
+        batch_op.drop_index('ix_calendar_blocks_listing_id_start_date_end_date')
+
+    op.drop_table('calendar_blocks')
@@ -0,0 +1,56 @@
+"""bookings archive
+
+Revision ID: d3a7f1c5e862
+Revises: 8e4c2a7f9b31
+Create Date: 2025-07-25 09:46:15.273941
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7f1c5e862'
+down_revision = '8e4c2a7f9b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('bookings_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('listing_id', sa.Integer(), nullable=False),
+    sa.Column('check_in', sa.DateTime(), nullable=False),
+    sa.Column('check_out', sa.DateTime(), nullable=False),
+    sa.Column('booking_status', sa.String(length=20), nullable=False),
+    sa.Column('total_price', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['listing_id'], ['listings.id'], name='bookings_archive_listing_id_fkey', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='bookings_archive_user_id_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('bookings_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_bookings_archive_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_bookings_archive_listing_id_check_in', ['listing_id', 'check_in'], unique=False)
+        batch_op.create_index('ix_bookings_archive_user_id_check_in', ['user_id', 'check_in'], unique=False)
+
+    with op.batch_alter_table('analytics_snapshot', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('archived_bookings', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('archived_revenue', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('popular_locations_with_archive', sa.Text(), server_default='[]', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('analytics_snapshot', schema=None) as batch_op:
+        batch_op.drop_column('popular_locations_with_archive')
+        batch_op.drop_column('archived_revenue')
+        batch_op.drop_column('archived_bookings')
+
+    with op.batch_alter_table('bookings_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_archive_user_id_check_in')
+        batch_op.drop_index('ix_bookings_archive_listing_id_check_in')
+        batch_op.drop_index(batch_op.f('ix_bookings_archive_created_at'))
+
+    op.drop_table('bookings_archive')
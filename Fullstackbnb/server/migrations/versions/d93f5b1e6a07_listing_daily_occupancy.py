@@ -0,0 +1,33 @@
+"""listing daily occupancy
+
+Revision ID: d93f5b1e6a07
+Revises: a7c2f0e8d951
+Create Date: 2025-07-11 10:37:29.664185
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93f5b1e6a07'
+down_revision = 'a7c2f0e8d951'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('listing_daily_occupancy',
+    sa.Column('listing_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('booked', sa.Boolean(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+    sa.ForeignKeyConstraint(['listing_id'], ['listings.id'], ),
+    sa.PrimaryKeyConstraint('listing_id', 'date')
+    )
+
+
+def downgrade():
+    op.drop_table('listing_daily_occupancy')
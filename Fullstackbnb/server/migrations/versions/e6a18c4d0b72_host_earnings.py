@@ -0,0 +1,57 @@
+"""host earnings
+
+Revision ID: e6a18c4d0b72
+Revises: d93f5b1e6a07
+Create Date: 2025-07-14 13:05:51.387229
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a18c4d0b72'
+down_revision = 'd93f5b1e6a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    host_earnings = op.create_table('host_earnings',
+    sa.Column('host_id', sa.Integer(), nullable=False),
+    sa.Column('listing_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('earnings', sa.Float(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['host_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['listing_id'], ['listings.id'], ),
+    sa.PrimaryKeyConstraint('host_id', 'listing_id', 'month')
+    )
+
+    # Seed the ledger from existing confirmed and completed bookings
+    bookings = sa.table('bookings',
+        sa.column('listing_id', sa.Integer), sa.column('check_in', sa.DateTime),
+        sa.column('booking_status', sa.String), sa.column('total_price', sa.Float))
+    listings = sa.table('listings', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer))
+    year = sa.extract('year', bookings.c.check_in)
+    month = sa.extract('month', bookings.c.check_in)
+    rows = op.get_bind().execute(
+        sa.select(listings.c.user_id, bookings.c.listing_id, year, month,
+                  sa.func.sum(bookings.c.total_price), sa.func.count())
+        .select_from(bookings.join(listings, bookings.c.listing_id == listings.c.id))
+        .where(bookings.c.booking_status.in_(['confirmed', 'completed']))
+        .group_by(listings.c.user_id, bookings.c.listing_id, year, month)
+    ).all()
+    if rows:
+        op.bulk_insert(host_earnings, [{
+            'host_id': host_id,
+            'listing_id': listing_id,
+            'month': date(int(booking_year), int(booking_month), 1),
+            'earnings': earnings or 0,
+            'bookings': count
+        } for host_id, listing_id, booking_year, booking_month, earnings, count in rows])
+
+
+def downgrade():
+    op.drop_table('host_earnings')
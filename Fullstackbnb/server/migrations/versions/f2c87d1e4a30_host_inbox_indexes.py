@@ -0,0 +1,34 @@
+"""host inbox indexes
+
+Revision ID: f2c87d1e4a30
+Revises: e6a18c4d0b72
+Create Date: 2025-07-16 11:02:47.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c87d1e4a30'
+down_revision = 'e6a18c4d0b72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_listing_id_booking_status')
+        batch_op.create_index('ix_bookings_listing_id_booking_status_check_in', ['listing_id', 'booking_status', 'check_in'], unique=False)
+
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.create_index('ix_listings_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('listings', schema=None) as batch_op:
+        batch_op.drop_index('ix_listings_user_id')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_listing_id_booking_status_check_in')
+        batch_op.create_index('ix_bookings_listing_id_booking_status', ['listing_id', 'booking_status'], unique=False)
@@ -5,9 +5,22 @@ from sqlalchemy import MetaData
 metadata = MetaData()
 db = SQLAlchemy(metadata=metadata)
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import sqlite3
 
 db = SQLAlchemy()
 
+
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and so ON DELETE CASCADE, when
+    # switched on for each connection
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
 #----User Model----
 class User(db.Model):
     __tablename__ = 'users'
@@ -16,13 +29,24 @@ class User(db.Model):
     email = db.Column(db.String(85), unique=True, nullable=False)
     password = db.Column(db.String(300), nullable=False)
     role = db.Column(db.String(20), nullable=False, default='guest') # 'guest', 'host' or 'admin'
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Case-insensitive prefix search in the admin directory runs
+    # lower(column) LIKE 'prefix%', text_pattern_ops lets Postgres use these
+    # for it whatever the database collation
+    __table_args__ = (
+        db.Index('ix_users_lower_username', db.func.lower(username).label('lower_username'),
+                 postgresql_ops={'lower_username': 'text_pattern_ops'}),
+        db.Index('ix_users_lower_email', db.func.lower(email).label('lower_email'),
+                 postgresql_ops={'lower_email': 'text_pattern_ops'}),
+    )
+
     # Relationships
-    bookings = db.relationship('Booking', backref='guest', lazy=True)
-    listings = db.relationship('Listing', backref='host', lazy=True)
-    favorites = db.relationship('Favorites', backref='user', lazy=True)
+    # Children go with the row through ON DELETE CASCADE, so the ORM doesn't load them first
+    bookings = db.relationship('Booking', backref='guest', lazy=True, passive_deletes=True)
+    listings = db.relationship('Listing', backref='host', lazy=True, passive_deletes=True)
+    favorites = db.relationship('Favorites', backref='user', lazy=True, passive_deletes=True)
 
 class TokenBlocklist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -33,31 +57,88 @@ class TokenBlocklist(db.Model):
 class Booking(db.Model):
     __tablename__ = 'bookings'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), nullable=False)
     check_in = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     check_out = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     booking_status = db.Column(db.String(20), default='pending', nullable=False)
     total_price = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    # Composite indexes for the hot paths: date overlap checks per listing,
+    # a guest's booking history and the host inbox by listing, status and date
+    __table_args__ = (
+        db.Index('ix_bookings_listing_id_check_in_check_out', 'listing_id', 'check_in', 'check_out'),
+        db.Index('ix_bookings_user_id_check_in', 'user_id', 'check_in'),
+        db.Index('ix_bookings_listing_id_booking_status_check_in', 'listing_id', 'booking_status', 'check_in'),
+        db.Index('ix_bookings_booking_status_created_at', 'booking_status', 'created_at'),
+        db.Index('ix_bookings_booking_status_check_out', 'booking_status', 'check_out'),
+    )
+
+#----Archived Bookings----
+class BookingArchive(db.Model):
+    # Finished bookings past the archive cutoff, moved out of bookings by
+    # archive.py with their ids kept
+    __tablename__ = 'bookings_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), nullable=False)
+    check_in = db.Column(db.DateTime, nullable=False)
+    check_out = db.Column(db.DateTime, nullable=False)
+    booking_status = db.Column(db.String(20), nullable=False)
+    total_price = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, index=True)
+    archived_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_bookings_archive_listing_id_check_in', 'listing_id', 'check_in'),
+        db.Index('ix_bookings_archive_user_id_check_in', 'user_id', 'check_in'),
+    )
+
+#----Location Dimension----
+class Location(db.Model):
+    __tablename__ = 'locations'
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(160), nullable=False)  # "city, region" or "city", see locations.py
+    city = db.Column(db.String(100), nullable=False, index=True)
+    region = db.Column(db.String(50), nullable=True)
+    name = db.Column(db.String(100), nullable=False)
+
+    # Autocomplete runs key LIKE 'prefix%', text_pattern_ops lets Postgres
+    # use the unique index for it whatever the database collation
+    __table_args__ = (
+        db.Index('ix_locations_key', 'key', unique=True, postgresql_ops={'key': 'text_pattern_ops'}),
+    )
+
+    def to_dict(self):
+        return {'id': self.id, 'key': self.key, 'city': self.city, 'region': self.region, 'name': self.name}
 
 #__-Listing Model----
 class Listing(db.Model):
     __tablename__ = 'listings'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=False)
     price_per_night = db.Column(db.Float, nullable=False)
     amenities = db.Column(db.Text, nullable=True)
     location = db.Column(db.String(100), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    location_id = db.Column(db.Integer, db.ForeignKey('locations.id'), nullable=True, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     image_url = db.Column(db.String(300), nullable=True)
-    status = db.Column(db.String, default='Pending')
+    status = db.Column(db.String, default='pending')
+    completed_stays = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # The moderation queue reads pending listings oldest first, and only
+    # those rows are kept in this index
+    __table_args__ = (
+        db.Index('ix_listings_pending_created_at', 'created_at', 'id',
+                 postgresql_where=db.text("status = 'pending'"), sqlite_where=db.text("status = 'pending'")),
+    )
 
     # Relationships
-    bookings = db.relationship('Booking', backref='listing', lazy=True)
-    favorited_by = db.relationship('Favorites', backref='listing', lazy=True)
+    bookings = db.relationship('Booking', backref='listing', lazy=True, passive_deletes=True)
+    favorited_by = db.relationship('Favorites', backref='listing', lazy=True, passive_deletes=True)
 
     def to_dict(self):
         return {
@@ -68,18 +149,145 @@ class Listing(db.Model):
             'price_per_night': self.price_per_night,
             'amenities': self.amenities,
             'location': self.location,
+            'location_id': self.location_id,
             'image_url': self.image_url,
             'status': self.status,
+            'completed_stays': self.completed_stays,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'host': self.host.username if self.host else None
         }
 
+#----Calendar Block Model----
+class CalendarBlock(db.Model):
+    __tablename__ = 'calendar_blocks'
+    id = db.Column(db.Integer, primary_key=True)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # exclusive, like a booking's check_out
+    source = db.Column(db.String(20), nullable=False, default='host')  # 'host' or 'ical'
+    # Host ranges may only carry a price override, those don't block the dates
+    blocked = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    nightly_price = db.Column(db.Float, nullable=True)
+    external_uid = db.Column(db.String(255), nullable=True)
+    summary = db.Column(db.String(200), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_calendar_blocks_listing_id_start_date_end_date', 'listing_id', 'start_date', 'end_date'),
+        db.UniqueConstraint('listing_id', 'external_uid', name='uq_calendar_blocks_listing_id_external_uid'),
+    )
+
+#----Booking Hold Model----
+class BookingHold(db.Model):
+    __tablename__ = 'booking_holds'
+    id = db.Column(db.Integer, primary_key=True)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    check_in = db.Column(db.Date, nullable=False)
+    check_out = db.Column(db.Date, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_booking_holds_listing_id_check_in_check_out', 'listing_id', 'check_in', 'check_out'),
+        db.Index('ix_booking_holds_expires_at', 'expires_at'),
+    )
+
+#----Daily Occupancy Rollup----
+class ListingDailyOccupancy(db.Model):
+    __tablename__ = 'listing_daily_occupancy'
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'), nullable=True)
+    booked = db.Column(db.Boolean, nullable=False, default=False)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+
+#----Host Earnings Ledger----
+class HostEarnings(db.Model):
+    __tablename__ = 'host_earnings'
+    host_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # first day of the check-in month
+    earnings = db.Column(db.Float, nullable=False, default=0)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+
+#----Admin Analytics Snapshot----
+class AnalyticsSnapshot(db.Model):
+    __tablename__ = 'analytics_snapshot'
+    id = db.Column(db.Integer, primary_key=True)  # a single row, id 1
+    total_bookings = db.Column(db.Integer, nullable=False, default=0)
+    total_revenue = db.Column(db.Float, nullable=False, default=0)
+    active_listings = db.Column(db.Integer, nullable=False, default=0)
+    total_users = db.Column(db.Integer, nullable=False, default=0)
+    popular_locations = db.Column(db.Text, nullable=False, default='[]')  # JSON list
+    # The same figures over bookings_archive, added in on request
+    archived_bookings = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    archived_revenue = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    popular_locations_with_archive = db.Column(db.Text, nullable=False, default='[]', server_default='[]')  # JSON list
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+#----Daily Platform Rollup----
+class DailyPlatformStats(db.Model):
+    __tablename__ = 'daily_platform_stats'
+    date = db.Column(db.Date, primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    new_users = db.Column(db.Integer, nullable=False, default=0)
+    new_listings = db.Column(db.Integer, nullable=False, default=0)
+
+#----Leaderboards----
+class LeaderboardDaily(db.Model):
+    # Per host or listing and day: earning bookings by creation day and
+    # reviews by review day, the source the trailing boards are summed from
+    __tablename__ = 'leaderboard_daily'
+    entity_type = db.Column(db.String(10), primary_key=True)  # 'host' or 'listing'
+    entity_id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+
+class LeaderboardScore(db.Model):
+    # One row per entity and period ('all', '30d', '365d'), read top-N
+    # through the per-metric indexes
+    __tablename__ = 'leaderboard_scores'
+    entity_type = db.Column(db.String(10), primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_leaderboard_scores_revenue', 'entity_type', 'period', 'revenue'),
+        db.Index('ix_leaderboard_scores_bookings', 'entity_type', 'period', 'bookings'),
+        db.Index('ix_leaderboard_scores_rating', 'entity_type', 'period', 'rating'),
+    )
+
+#----Nightly Price Distribution per Location----
+class LocationPriceStats(db.Model):
+    __tablename__ = 'location_price_stats'
+    location = db.Column(db.String(160), primary_key=True)  # locations.key
+    display_name = db.Column(db.String(100), nullable=False)
+    listing_count = db.Column(db.Integer, nullable=False)
+    min_price = db.Column(db.Float, nullable=False)
+    median_price = db.Column(db.Float, nullable=False)
+    p90_price = db.Column(db.Float, nullable=False)
+    mean_price = db.Column(db.Float, nullable=False)
+    max_price = db.Column(db.Float, nullable=False)
+    histogram = db.Column(db.Text, nullable=False, default='[]')  # JSON list of bins
+    outlier_listing_ids = db.Column(db.Text, nullable=False, default='[]')  # JSON list
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
 #----Association Table for Many-to-Many Relationship between Users and Listings----
 class Favorites (db.Model):
     __tablename__ = 'favorites'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), nullable=False)
     note = db.Column(db.String(200), default ="Want to book next month we gatchu you can always count on us!", nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -87,15 +295,15 @@ class Favorites (db.Model):
 class Review(db.Model):
     __tablename__ = 'reviews'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    listing_id = db.Column(db.Integer, db.ForeignKey('listings.id', ondelete='CASCADE'), nullable=False)
     rating = db.Column(db.Integer, nullable=False)  
     comment = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationships
-    user = db.relationship('User', backref='reviews')
-    listing = db.relationship('Listing', backref='reviews')
+    user = db.relationship('User', backref=db.backref('reviews', passive_deletes=True))
+    listing = db.relationship('Listing', backref=db.backref('reviews', passive_deletes=True))
 
 
 
@@ -0,0 +1,184 @@
+from datetime import date, datetime, timedelta
+import click
+import numpy as np
+from models import db, Booking, BookingArchive, ListingDailyOccupancy
+
+# Statuses whose nights count as occupied
+OCCUPIED_STATUSES = ('confirmed', 'completed')
+
+EPOCH = date(1970, 1, 1)
+
+
+def as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def as_day(value):
+    # func.date() comes back as a string on SQLite and a date on Postgres
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def occupy_booking(booking):
+    check_in = as_date(booking.check_in)
+    check_out = as_date(booking.check_out)
+    nights = (check_out - check_in).days
+    if nights <= 0:
+        return
+    table = ListingDailyOccupancy.__table__
+    db.session.execute(table.delete().where(
+        table.c.listing_id == booking.listing_id,
+        table.c.date >= check_in,
+        table.c.date < check_out
+    ))
+    nightly_rate = (booking.total_price or 0) / nights
+    db.session.execute(table.insert(), [{
+        'listing_id': booking.listing_id,
+        'date': check_in + timedelta(days=night),
+        'booking_id': booking.id,
+        'booked': True,
+        'revenue': nightly_rate
+    } for night in range(nights)])
+
+
+def release_booking(booking):
+    table = ListingDailyOccupancy.__table__
+    db.session.execute(table.update().where(table.c.booking_id == booking.id).values(
+        booked=False, revenue=0, booking_id=None
+    ))
+
+
+def release_archived_stays(user_id):
+    # Archived stays' nights have no booking_id for the cascade to follow, so
+    # they are cleared by listing and date range before the guest is deleted
+    table = ListingDailyOccupancy.__table__
+    stays = db.session.query(BookingArchive.listing_id, BookingArchive.check_in, BookingArchive.check_out).filter(
+        BookingArchive.user_id == user_id,
+        BookingArchive.booking_status.in_(OCCUPIED_STATUSES)
+    ).all()
+    for listing_id, check_in, check_out in stays:
+        db.session.execute(table.delete().where(
+            table.c.listing_id == listing_id,
+            table.c.booking_id.is_(None),
+            table.c.date >= as_date(check_in),
+            table.c.date < as_date(check_out)
+        ))
+
+
+def sync_booking_occupancy(booking, previous_status):
+    # Call before committing a status change so the rollup moves with it
+    was_occupied = previous_status in OCCUPIED_STATUSES
+    is_occupied = booking.booking_status in OCCUPIED_STATUSES
+    if is_occupied and not was_occupied:
+        occupy_booking(booking)
+    elif was_occupied and not is_occupied:
+        release_booking(booking)
+
+
+def occupancy_series(listing_id, start, end):
+    # Served by the (listing_id, date) primary key as one range scan
+    return db.session.query(
+        ListingDailyOccupancy.date, ListingDailyOccupancy.booked, ListingDailyOccupancy.revenue
+    ).filter(
+        ListingDailyOccupancy.listing_id == listing_id,
+        ListingDailyOccupancy.date >= start,
+        ListingDailyOccupancy.date < end
+    ).order_by(ListingDailyOccupancy.date).all()
+
+
+def expand_nights(listing_ids, booking_ids, check_ins, check_outs, prices):
+    # Turns N bookings into one row per night without a Python loop per night
+    nights = check_outs - check_ins
+    keep = nights > 0
+    listing_ids, booking_ids, check_ins, nights, prices = (
+        listing_ids[keep], booking_ids[keep], check_ins[keep], nights[keep], prices[keep]
+    )
+    starts = np.repeat(np.cumsum(nights) - nights, nights)
+    offsets = np.arange(nights.sum()) - starts
+    return (
+        np.repeat(listing_ids, nights),
+        np.repeat(booking_ids, nights),
+        np.repeat(check_ins, nights) + offsets,
+        np.repeat(prices / nights, nights)
+    )
+
+
+def dedupe_nights(listing_ids, days, carry):
+    # Overlapping occupied bookings shouldn't exist, but if they do the first
+    # one in (listing_id, check_in) order keeps the night. ``carry`` is the
+    # last night already written for the previous chunk's final listing.
+    keys = listing_ids * 1000000 + days
+    _, first = np.unique(keys, return_index=True)
+    keep = np.zeros(len(keys), dtype=bool)
+    keep[first] = True
+    if carry is not None:
+        keep &= ~((listing_ids == carry[0]) & (days <= carry[1]))
+    return keep
+
+
+def backfill_occupancy(chunk_size=5000):
+    table = ListingDailyOccupancy.__table__
+    db.session.execute(table.delete())
+
+    # Archived stays keep their nights, written without a booking_id as the
+    # archive command leaves them
+    stays = db.union_all(
+        db.select(
+            Booking.listing_id, Booking.id.label('booking_id'), Booking.check_in, Booking.check_out,
+            Booking.total_price, Booking.id.label('sort_id')
+        ).where(Booking.booking_status.in_(OCCUPIED_STATUSES)),
+        db.select(
+            BookingArchive.listing_id, db.literal(None, db.Integer).label('booking_id'), BookingArchive.check_in,
+            BookingArchive.check_out, BookingArchive.total_price, BookingArchive.id.label('sort_id')
+        ).where(BookingArchive.booking_status.in_(OCCUPIED_STATUSES))
+    ).subquery()
+    query = db.session.query(
+        stays.c.listing_id, stays.c.booking_id, stays.c.check_in, stays.c.check_out, stays.c.total_price
+    ).order_by(stays.c.listing_id, stays.c.check_in, stays.c.sort_id)
+
+    total = 0
+    carry = None
+    chunk = []
+    for row in query.yield_per(chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            written, carry = insert_chunk(table, chunk, carry)
+            total += written
+            chunk = []
+    if chunk:
+        written, carry = insert_chunk(table, chunk, carry)
+        total += written
+    db.session.commit()
+    return total
+
+
+def insert_chunk(table, chunk, carry):
+    listing_ids = np.array([row[0] for row in chunk], dtype=np.int64)
+    booking_ids = np.array([-1 if row[1] is None else row[1] for row in chunk], dtype=np.int64)
+    check_ins = np.array([(as_date(row[2]) - EPOCH).days for row in chunk], dtype=np.int64)
+    check_outs = np.array([(as_date(row[3]) - EPOCH).days for row in chunk], dtype=np.int64)
+    prices = np.array([row[4] or 0 for row in chunk], dtype=np.float64)
+
+    listing_ids, booking_ids, days, revenue = expand_nights(listing_ids, booking_ids, check_ins, check_outs, prices)
+    keep = dedupe_nights(listing_ids, days, carry)
+    listing_ids, booking_ids, days, revenue = listing_ids[keep], booking_ids[keep], days[keep], revenue[keep]
+    if not len(days):
+        return 0, carry
+
+    last_listing = listing_ids[-1]
+    carry = (last_listing, days[listing_ids == last_listing].max())
+    db.session.execute(table.insert(), [{
+        'listing_id': int(listing_id),
+        'date': EPOCH + timedelta(days=int(day)),
+        'booking_id': int(booking_id) if booking_id >= 0 else None,
+        'booked': True,
+        'revenue': float(nightly)
+    } for listing_id, booking_id, day, nightly in zip(listing_ids, booking_ids, days, revenue)])
+    return len(days), carry
+
+
+@click.command('backfill-occupancy')
+@click.option('--chunk-size', default=5000, show_default=True, help='Bookings expanded per chunk.')
+def backfill_occupancy_command(chunk_size):
+    """Rebuild listing_daily_occupancy from confirmed and completed bookings, archived ones included."""
+    count = backfill_occupancy(chunk_size=chunk_size)
+    click.echo(f"Wrote {count} occupied nights")
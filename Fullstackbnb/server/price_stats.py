@@ -0,0 +1,132 @@
+from datetime import datetime
+import json
+import click
+import numpy as np
+from sqlalchemy.exc import IntegrityError
+from models import db, Listing, Location, LocationPriceStats
+
+PRICE_HISTOGRAM_BINS = 10
+# Locations with fewer active listings get no outlier flags
+OUTLIER_MIN_LISTINGS = 4
+OUTLIER_IQR_FACTOR = 1.5
+
+
+def compute_price_stats():
+    # One fetch of active listing prices, then every location is handled at
+    # once by sorting on (location id, price)
+    rows = db.session.query(Listing.id, Listing.location_id, Listing.price_per_night).filter(
+        Listing.status == 'active',
+        Listing.location_id.isnot(None),
+        Listing.price_per_night.isnot(None)
+    ).all()
+    if not rows:
+        return []
+
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    prices = np.array([row[2] for row in rows], dtype=np.float64)
+    location_ids, groups = np.unique(
+        np.array([row[1] for row in rows], dtype=np.int64), return_inverse=True
+    )
+    locations = {
+        location.id: location
+        for location in Location.query.filter(Location.id.in_(location_ids.tolist()))
+    }
+
+    order = np.lexsort((prices, groups))
+    ids, prices, groups = ids[order], prices[order], groups[order]
+    counts = np.bincount(groups, minlength=len(location_ids))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    def quantile(q):
+        # Linear interpolation between the closest ranks, as np.percentile does
+        position = q * (counts - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.minimum(low + 1, counts - 1)
+        fraction = position - low
+        return prices[starts + low] * (1 - fraction) + prices[starts + high] * fraction
+
+    mins = prices[starts]
+    maxs = prices[starts + counts - 1]
+    means = np.bincount(groups, weights=prices, minlength=len(location_ids)) / counts
+    medians = quantile(0.5)
+    p90s = quantile(0.9)
+
+    # Each location gets the same number of bins spread over its own range
+    spans = maxs - mins
+    widths = np.where(spans > 0, spans, 1) / PRICE_HISTOGRAM_BINS
+    bins = np.minimum(((prices - mins[groups]) / widths[groups]).astype(np.int64), PRICE_HISTOGRAM_BINS - 1)
+    histograms = np.bincount(
+        groups * PRICE_HISTOGRAM_BINS + bins, minlength=len(location_ids) * PRICE_HISTOGRAM_BINS
+    ).reshape(len(location_ids), PRICE_HISTOGRAM_BINS)
+
+    # Tukey fences on the interquartile range
+    q1 = quantile(0.25)
+    q3 = quantile(0.75)
+    fence = OUTLIER_IQR_FACTOR * (q3 - q1)
+    outliers = (counts[groups] >= OUTLIER_MIN_LISTINGS) & (
+        (prices < (q1 - fence)[groups]) | (prices > (q3 + fence)[groups])
+    )
+    outlier_ids = {}
+    for group, listing_id in zip(groups[outliers].tolist(), ids[outliers].tolist()):
+        outlier_ids.setdefault(group, []).append(listing_id)
+
+    return [{
+        'location': locations[location_id].key,
+        'display_name': locations[location_id].name,
+        'listing_count': int(counts[group]),
+        'min_price': float(mins[group]),
+        'median_price': float(medians[group]),
+        'p90_price': float(p90s[group]),
+        'mean_price': float(means[group]),
+        'max_price': float(maxs[group]),
+        'histogram': json.dumps([{
+            'from': float(mins[group] + widths[group] * index),
+            'to': float(mins[group] + widths[group] * (index + 1)),
+            'count': int(count)
+        } for index, count in enumerate(histograms[group])]),
+        'outlier_listing_ids': json.dumps(outlier_ids.get(group, []))
+    } for group, location_id in enumerate(location_ids.tolist())]
+
+
+def refresh_price_stats():
+    # The table is small (one row per location). Rows are updated in place and
+    # only new locations inserted, so refreshes running in two workers at once
+    # don't collide on the key.
+    values = compute_price_stats()
+    refreshed_at = datetime.utcnow()
+    table = LocationPriceStats.__table__
+    db.session.execute(table.delete().where(table.c.location.notin_([row['location'] for row in values])))
+    for row in values:
+        row = dict(row, refreshed_at=refreshed_at)
+        where = table.c.location == row['location']
+        if not db.session.execute(table.update().where(where).values(**row)).rowcount:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert().values(**row))
+            except IntegrityError:
+                db.session.execute(table.update().where(where).values(**row))
+    db.session.commit()
+    return len(values)
+
+
+def price_stats_dict(row):
+    return {
+        'location': row.location,
+        'displayName': row.display_name,
+        'listingCount': row.listing_count,
+        'minPrice': row.min_price,
+        'medianPrice': row.median_price,
+        'p90Price': row.p90_price,
+        'meanPrice': row.mean_price,
+        'maxPrice': row.max_price,
+        'histogram': json.loads(row.histogram),
+        'outlierListingIds': json.loads(row.outlier_listing_ids),
+        'refreshedAt': row.refreshed_at.isoformat()
+    }
+
+
+@click.command('refresh-price-stats')
+def refresh_price_stats_command():
+    """Recompute nightly price percentiles and histograms per location."""
+    locations = refresh_price_stats()
+    click.echo(f"Price stats refreshed for {locations} locations")
@@ -0,0 +1,108 @@
+import click
+from sqlalchemy import text
+from models import db
+
+# Hot queries that must be served from an index. Each entry is the SQL as
+# the views issue it plus sample parameters to plan it with, or a dict of
+# those per dialect name with a 'default' entry.
+HOT_QUERIES = {
+    'booking_overlap': (
+        "SELECT id FROM bookings "
+        "WHERE listing_id = :listing_id AND check_out > :check_in AND check_in < :check_out "
+        "AND booking_status != 'cancelled' LIMIT 1",
+        {'listing_id': 1, 'check_in': '2025-01-01', 'check_out': '2025-01-05'}
+    ),
+    'guest_bookings': (
+        "SELECT id, listing_id, check_in, check_out FROM bookings "
+        "WHERE user_id = :user_id ORDER BY check_in",
+        {'user_id': 1}
+    ),
+    'host_confirmed_bookings': (
+        "SELECT total_price FROM bookings "
+        "WHERE listing_id IN (:listing_a, :listing_b) AND booking_status = 'confirmed'",
+        {'listing_a': 1, 'listing_b': 2}
+    ),
+    'host_inbox': (
+        "SELECT bookings.id FROM bookings JOIN listings ON bookings.listing_id = listings.id "
+        "WHERE listings.user_id = :host_id AND bookings.booking_status = 'pending' "
+        "AND bookings.check_in < :date_to ORDER BY bookings.check_in DESC, bookings.id DESC LIMIT 51",
+        {'host_id': 1, 'date_to': '2025-02-01'}
+    ),
+    'bookings_past_checkout': (
+        "SELECT id FROM bookings WHERE booking_status = 'confirmed' AND check_out <= :now LIMIT 500",
+        {'now': '2025-01-01 00:00:00'}
+    ),
+    'calendar_block_overlap': (
+        "SELECT id FROM calendar_blocks "
+        "WHERE listing_id = :listing_id AND end_date > :check_in AND start_date < :check_out "
+        "AND blocked LIMIT 1",
+        {'listing_id': 1, 'check_in': '2025-01-01', 'check_out': '2025-01-05'}
+    ),
+    'checkout_hold_overlap': (
+        "SELECT id FROM booking_holds "
+        "WHERE listing_id = :listing_id AND check_out > :check_in AND check_in < :check_out "
+        "AND expires_at > :now LIMIT 1",
+        {'listing_id': 1, 'check_in': '2025-01-01', 'check_out': '2025-01-05', 'now': '2025-01-01 00:00:00'}
+    ),
+    'admin_user_search': {
+        'postgresql': (
+            "SELECT id FROM users WHERE id > :after_id AND id IN ("
+            "SELECT id FROM users WHERE lower(username) LIKE :pattern "
+            "UNION SELECT id FROM users WHERE lower(email) LIKE :pattern"
+            ") ORDER BY id LIMIT 101",
+            {'after_id': 0, 'pattern': 'ali%'}
+        ),
+        'default': (
+            "SELECT id FROM users WHERE id > :after_id AND id IN ("
+            "SELECT id FROM users WHERE lower(username) >= :low AND lower(username) < :high "
+            "UNION SELECT id FROM users WHERE lower(email) >= :low AND lower(email) < :high"
+            ") ORDER BY id LIMIT 101",
+            {'after_id': 0, 'low': 'ali', 'high': 'alj'}
+        ),
+    },
+}
+
+
+def explain(sql, params):
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as connection:
+        trans = connection.begin()
+        try:
+            if dialect == 'postgresql':
+                # Small tables make the planner prefer a seq scan even when a
+                # usable index exists, so ask it to use one whenever it can
+                connection.execute(text("SET LOCAL enable_seqscan = off"))
+                rows = connection.execute(text("EXPLAIN " + sql), params)
+                return [row[0] for row in rows]
+            rows = connection.execute(text("EXPLAIN QUERY PLAN " + sql), params)
+            return [row[-1] for row in rows]
+        finally:
+            trans.rollback()
+
+
+def is_sequential_scan(plan):
+    for line in plan:
+        if 'Seq Scan on' in line or line.startswith('SCAN '):
+            return True
+    return False
+
+
+@click.command('check-query-plans')
+def check_query_plans():
+    """Fail if any hot query falls back to a sequential scan."""
+    failures = []
+    dialect = db.engine.dialect.name
+    for name, entry in HOT_QUERIES.items():
+        if isinstance(entry, dict):
+            entry = entry.get(dialect, entry['default'])
+        sql, params = entry
+        plan = explain(sql, params)
+        status = 'SEQ SCAN' if is_sequential_scan(plan) else 'ok'
+        click.echo(f"{name}: {status}")
+        for line in plan:
+            click.echo(f"    {line}")
+        if status != 'ok':
+            failures.append(name)
+
+    if failures:
+        raise click.ClickException(f"Sequential scan in: {', '.join(failures)}")
@@ -0,0 +1,13 @@
+from occupancy import sync_booking_occupancy
+from ledger import sync_host_earnings
+from leaderboards import sync_leaderboards
+
+
+def record_booking_status_change(booking, previous_status):
+    # Keeps every booking rollup in the same transaction as the status change,
+    # so call it after setting the new status and before committing
+    if booking.booking_status == previous_status:
+        return
+    sync_booking_occupancy(booking, previous_status)
+    sync_host_earnings(booking, previous_status)
+    sync_leaderboards(booking, previous_status)
@@ -6,3 +6,6 @@ from .admin import *
 from .favorite import *
 from .review import *
 from .auth import *
+from .calendar import *
+from .hold import *
+from .export import *
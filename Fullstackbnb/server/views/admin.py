@@ -1,9 +1,62 @@
-from flask import Blueprint, jsonify, request
-from models import db, User, Listing, Booking, Favorites, Review
+from flask import Blueprint, jsonify, request, current_app
+from models import db, User, Listing, LocationPriceStats
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from cache import host_dashboard_cache, listing_insights_cache
+from availability import availability_cache
+from analytics import get_analytics_snapshot, with_archive, daily_timeseries, TIMESERIES_METRICS, TIMESERIES_BUCKETS
+from analytics import deleted_stat_days, reroll_daily_stats, request_analytics_refresh
+from price_stats import refresh_price_stats, price_stats_dict
+from leaderboards import rebuild_leaderboards, remove_from_leaderboards, top_entries
+from leaderboards import LEADERBOARD_METRICS, LEADERBOARD_PERIODS, LEADERBOARD_ENTITIES
+from locations import location_key
+from datetime import datetime, timedelta
+from sqlalchemy.orm import contains_eager
+import base64
 
 admin_blueprint = Blueprint('admin', __name__)
 
+USERS_PAGE_SIZE = 100
+USERS_MAX_PAGE_SIZE = 500
+USER_ROLES = ('guest', 'host', 'admin')
+ROLE_CHANGE_MAX_USERS = 1000
+LEADERBOARD_SIZE = 10
+LEADERBOARD_MAX_SIZE = 100
+MODERATION_PAGE_SIZE = 50
+MODERATION_MAX_PAGE_SIZE = 200
+MODERATION_MAX_DECISIONS = 500
+# Listing status each moderation decision moves a pending listing to
+MODERATION_DECISIONS = {'approve': 'active', 'reject': 'inactive'}
+
+
+def encode_moderation_cursor(listing):
+    raw = f"{listing.created_at.isoformat()}|{listing.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_moderation_cursor(cursor):
+    try:
+        created_at, listing_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(listing_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def prefix_match(column, prefix):
+    # Postgres serves LIKE 'prefix%' from the text_pattern_ops indexes, while
+    # SQLite only serves plain range comparisons from expression indexes
+    if db.engine.dialect.name == 'postgresql':
+        pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return column.like(pattern, escape='\\')
+    return db.and_(column >= prefix, column < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+def user_search_filter(search):
+    # Prefix only. A UNION of one range scan per lower() index yields the
+    # matching ids, rather than filtering users row by row in id order
+    matches = db.union(
+        db.select(User.id).where(prefix_match(db.func.lower(User.username), search)),
+        db.select(User.id).where(prefix_match(db.func.lower(User.email), search))
+    )
+    return User.id.in_(matches)
+
 def require_admin_role(identity=None):
     if identity is None:
         identity = get_jwt_identity()
@@ -20,17 +73,42 @@ def get_all_users():
     current_user = User.query.get(user_id)
     if not current_user or current_user.role != 'admin':
         return jsonify({"error": "Unauthorized"}), 403
-    users = User.query.all()
-    return jsonify([ 
-        { 
-            "id": user.id, 
-            "username": user.username, 
-            "email": user.email, 
-            "created_at": user.created_at, 
-            "updated_at": user.updated_at, 
-            "role": user.role 
-        } for user in users 
-    ]), 200
+
+    role = request.args.get('role')
+    if role and role not in USER_ROLES:
+        return jsonify({"error": f"role must be one of {', '.join(USER_ROLES)}"}), 400
+    after_id = request.args.get('cursor', 0, type=int)
+    per_page = request.args.get('per_page', USERS_PAGE_SIZE, type=int)
+    if per_page < 1:
+        return jsonify({"error": "per_page must be a positive integer"}), 400
+    per_page = min(per_page, USERS_MAX_PAGE_SIZE)
+
+    # Keyset pagination on the primary key, each page is an index range
+    query = User.query.filter(User.id > after_id)
+    search = (request.args.get('q') or '').strip().lower()
+    if search:
+        query = query.filter(user_search_filter(search))
+    if role:
+        query = query.filter(User.role == role)
+    users = query.order_by(User.id).limit(per_page + 1).all()
+    has_more = len(users) > per_page
+    users = users[:per_page]
+
+    response = jsonify([
+        {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+            "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+            "role": user.role
+        } for user in users
+    ])
+    response.headers['X-Per-Page'] = str(per_page)
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    if has_more:
+        response.headers['X-Next-Cursor'] = str(users[-1].id)
+    return response, 200
 
 # ==========Get all listings==========
 @admin_blueprint.route('/admin/listings', methods=['GET'])
@@ -51,14 +129,21 @@ def delete_listing(listing_id):
     current_user = User.query.get(user_id)
     if not current_user or current_user.role != 'admin':
         return jsonify({"error": "Unauthorized"}), 403
-    listing = Listing.query.get(listing_id)
-    if not listing:
+    # Bookings, reviews, favorites, calendar rows and rollups go with it
+    # through ON DELETE CASCADE
+    stat_days = deleted_stat_days(listing_ids=[listing_id])
+    host_id = db.session.execute(
+        db.delete(Listing).where(Listing.id == listing_id).returning(Listing.user_id)
+    ).scalar()
+    if host_id is None:
         return jsonify({"error": "Listing not found"}), 404
-    Booking.query.filter_by(listing_id=listing_id).delete()
-    Favorites.query.filter_by(listing_id=listing_id).delete()
-    Review.query.filter_by(listing_id=listing_id).delete()
-    db.session.delete(listing)
+    remove_from_leaderboards([listing_id])
+    rebuild_leaderboards([host_id])
+    reroll_daily_stats(stat_days)
     db.session.commit()
+    availability_cache.invalidate(listing_id)
+    host_dashboard_cache.invalidate(host_id)
+    listing_insights_cache.invalidate_group(listing_id)
     return jsonify({"success": "Listing deleted successfully"}), 200
 
 # ==========Get analytics==========
@@ -70,30 +155,125 @@ def get_analytics():
     if not current_user or current_user.role != 'admin':
         return jsonify({"error": "Unauthorized"}), 403
     
-    total_bookings = Booking.query.count()
-    total_revenue = db.session.query(db.func.sum(Booking.total_price)).scalar() or 0
-    active_listings = Listing.query.filter_by(status='active').count()
-    total_users = User.query.count()
-    
-    # Get popular locations with booking counts and revenue
-    popular_locations = db.session.query(
-        Listing.location, 
-        db.func.count(Booking.id).label('booking_count'),
-        db.func.sum(Booking.total_price).label('location_revenue')
-    ).join(Booking, Booking.listing_id == Listing.id).group_by(Listing.location).order_by(db.desc('booking_count')).limit(5).all()
-    
+    # Totals come from the analytics_snapshot row, refreshed in the background
+    # by the analytics job or once it is older than the allowed age
+    snapshot = with_archive(get_analytics_snapshot(), request.args.get('include_archived') == 'true')
+    return jsonify(dict(
+        snapshot,
+        refreshedAt=snapshot['refreshedAt'].isoformat(),
+        snapshotAgeSeconds=int((datetime.utcnow() - snapshot['refreshedAt']).total_seconds())
+    ))
+
+# ==========Get analytics over time==========
+@admin_blueprint.route('/admin/analytics/timeseries', methods=['GET'])
+@jwt_required()
+def get_analytics_timeseries():
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    metric = request.args.get('metric', 'revenue')
+    bucket = request.args.get('bucket', 'day')
+    if metric not in TIMESERIES_METRICS:
+        return jsonify({"error": f"metric must be one of {', '.join(TIMESERIES_METRICS)}"}), 400
+    if bucket not in TIMESERIES_BUCKETS:
+        return jsonify({"error": f"bucket must be one of {', '.join(TIMESERIES_BUCKETS)}"}), 400
+
+    today = datetime.utcnow().date()
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if 'from' in request.args else today - timedelta(days=29)
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if 'to' in request.args else today + timedelta(days=1)
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if end <= start:
+        return jsonify({"error": "to must be after from"}), 400
+    if (end - start).days > 3660:
+        return jsonify({"error": "Date range cannot exceed ten years"}), 400
+
+    # Recent days are rolled up together with the analytics snapshot
+    snapshot = get_analytics_snapshot()
     return jsonify({
-        'totalBookings': total_bookings,
-        'totalRevenue': total_revenue,
-        'activeListings': active_listings,
-        'totalUsers': total_users,
-        'popularLocations': [
-            {
-                'location': loc, 
-                'bookings': count,
-                'revenue': revenue or 0
-            } for loc, count, revenue in popular_locations
-        ]
+        'metric': metric,
+        'bucket': bucket,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'refreshedAt': snapshot['refreshedAt'].isoformat(),
+        'points': daily_timeseries(metric, bucket, start, end)
+    })
+
+# ==========Get nightly price distribution per location==========
+@admin_blueprint.route('/admin/analytics/prices', methods=['GET'])
+@jwt_required()
+def get_price_analytics():
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    try:
+        min_listings = int(request.args.get('min_listings', 1))
+    except ValueError:
+        return jsonify({"error": "min_listings must be an integer"}), 400
+
+    # Rows come from the location_price_stats table, refreshed by the
+    # analytics job. Like the snapshot, stale rows are served while that job
+    # runs in the background, and only an empty table is computed here.
+    refreshed_at = db.session.query(db.func.max(LocationPriceStats.refreshed_at)).scalar()
+    max_age = current_app.config.get('ANALYTICS_SNAPSHOT_MAX_AGE_SECONDS', 300)
+    if refreshed_at is None:
+        refresh_price_stats()
+    elif (datetime.utcnow() - refreshed_at).total_seconds() > max_age:
+        request_analytics_refresh()
+    query = LocationPriceStats.query.filter(LocationPriceStats.listing_count >= min_listings)
+    if request.args.get('location'):
+        query = query.filter(LocationPriceStats.location == location_key(request.args['location']))
+    rows = query.order_by(LocationPriceStats.listing_count.desc(), LocationPriceStats.location).all()
+    return jsonify([price_stats_dict(row) for row in rows])
+
+# ==========Get top hosts or listings==========
+@admin_blueprint.route('/admin/leaderboards', methods=['GET'])
+@jwt_required()
+def get_leaderboards():
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    metric = request.args.get('by', 'revenue')
+    period = request.args.get('period', 'all')
+    entity = request.args.get('entity', 'hosts')
+    if metric not in LEADERBOARD_METRICS:
+        return jsonify({"error": f"by must be one of {', '.join(LEADERBOARD_METRICS)}"}), 400
+    if period not in LEADERBOARD_PERIODS:
+        return jsonify({"error": f"period must be one of {', '.join(LEADERBOARD_PERIODS)}"}), 400
+    if entity not in LEADERBOARD_ENTITIES:
+        return jsonify({"error": f"entity must be one of {', '.join(LEADERBOARD_ENTITIES)}"}), 400
+    limit = request.args.get('limit', LEADERBOARD_SIZE, type=int)
+    if limit < 1:
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    limit = min(limit, LEADERBOARD_MAX_SIZE)
+
+    # Scores are kept up to date on every booking and review write, the
+    # analytics job (or `flask rebuild-leaderboards --trailing`) drops expired
+    # days from the trailing windows. Reading them is an index range and
+    # nothing more.
+    entries = top_entries(LEADERBOARD_ENTITIES[entity], metric, period, limit)
+    ids = [entry.entity_id for entry in entries]
+    if entity == 'hosts':
+        names = dict(db.session.query(User.id, User.username).filter(User.id.in_(ids)))
+    else:
+        names = dict(db.session.query(Listing.id, Listing.title).filter(Listing.id.in_(ids)))
+    return jsonify({
+        'by': metric,
+        'period': period,
+        'entity': entity,
+        'leaders': [{
+            'rank': rank,
+            'id': entry.entity_id,
+            'name': names.get(entry.entity_id),
+            'revenue': entry.revenue,
+            'bookings': entry.bookings,
+            'rating': entry.rating,
+            'reviews': entry.rating_count
+        } for rank, entry in enumerate(entries, 1)]
     })
 
 # ======promote or demote a user from guest to host or vice versa ==========
@@ -115,6 +295,82 @@ def change_user_role(user_id):
     db.session.commit()
     return jsonify({"success": f"User role changed to {new_role}"}), 200
 
+# ======change the role of many users at once ==========
+@admin_blueprint.route('/admin/users/roles', methods=['PATCH'])
+@jwt_required()
+def change_user_roles():
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json() or {}
+    new_role = data.get('role')
+    if new_role not in USER_ROLES:
+        return jsonify({"error": f"role must be one of {', '.join(USER_ROLES)}"}), 400
+    user_ids = data.get('user_ids')
+    user_filter = data.get('filter')
+    if (user_ids is None) == (user_filter is None):
+        return jsonify({"error": "Provide either user_ids or filter"}), 400
+
+    # The acting admin is never changed, so they cannot demote themselves
+    conditions = [User.role != new_role, User.id != current_user.id]
+    if user_ids is not None:
+        # JSON true/false would otherwise pass as ids 1 and 0
+        if not isinstance(user_ids, list) or not user_ids or not all(
+            isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids
+        ):
+            return jsonify({"error": "user_ids must be a non-empty list of integers"}), 400
+        if len(user_ids) > ROLE_CHANGE_MAX_USERS:
+            return jsonify({"error": f"At most {ROLE_CHANGE_MAX_USERS} users per request"}), 400
+        user_ids = list(dict.fromkeys(user_ids))
+        conditions.append(User.id.in_(user_ids))
+    else:
+        if not isinstance(user_filter, dict) or not (user_filter.get('role') or user_filter.get('q')):
+            return jsonify({"error": "filter needs a role or q"}), 400
+        if user_filter.get('role') and user_filter['role'] not in USER_ROLES:
+            return jsonify({"error": f"filter role must be one of {', '.join(USER_ROLES)}"}), 400
+        if user_filter.get('role'):
+            conditions.append(User.role == user_filter['role'])
+        search = str(user_filter.get('q') or '').strip().lower()
+        if search:
+            conditions.append(user_search_filter(search))
+
+    try:
+        # One UPDATE for the whole set, users already in the role are skipped
+        result = db.session.execute(
+            db.update(User).where(*conditions).values(
+                role=new_role, updated_at=datetime.utcnow()
+            ).returning(User.id).execution_options(synchronize_session=False)
+        )
+        updated = {row[0] for row in result}
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to change roles", "details": str(e)}), 500
+
+    # Roles are read from the database on every request, the only per-user
+    # data cached is the host dashboard
+    for user_id in updated:
+        host_dashboard_cache.invalidate(user_id)
+
+    response = {"role": new_role, "updated": len(updated)}
+    if user_ids is not None:
+        missing = [user_id for user_id in user_ids if user_id not in updated]
+        existing = set()
+        if missing:
+            existing = {user_id for (user_id,) in db.session.query(User.id).filter(User.id.in_(missing))}
+        failures = []
+        for user_id in missing:
+            if user_id == current_user.id:
+                error = 'cannot_change_own_role'
+            elif user_id in existing:
+                error = 'already_in_role'
+            else:
+                error = 'not_found'
+            failures.append({"id": user_id, "error": error})
+        response["failures"] = failures
+    return jsonify(response), 200
+
 @admin_blueprint.route('/admin/listings/<int:listing_id>/status', methods=['PATCH'])
 @jwt_required()
 def update_listing_status(listing_id):
@@ -144,4 +400,99 @@ def update_listing_status(listing_id):
         "success": f"Listing status updated to {new_status}",
         "listing_id": listing_id,
         "new_status": new_status
-    }), 200
\ No newline at end of file
+    }), 200
+
+# ==========Moderation queue of pending listings==========
+@admin_blueprint.route('/admin/moderation', methods=['GET'])
+@jwt_required()
+def get_moderation_queue():
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    per_page = request.args.get('per_page', MODERATION_PAGE_SIZE, type=int)
+    if per_page < 1:
+        return jsonify({"error": "per_page must be a positive integer"}), 400
+    per_page = min(per_page, MODERATION_MAX_PAGE_SIZE)
+
+    # Oldest first from the partial (created_at, id) index on pending rows,
+    # with the host joined in rather than loaded per listing
+    query = Listing.query.join(User, Listing.user_id == User.id).options(
+        contains_eager(Listing.host)
+    ).filter(Listing.status == 'pending')
+    cursor = request.args.get('cursor')
+    if cursor:
+        cursor = decode_moderation_cursor(cursor)
+        if not cursor:
+            return jsonify({"error": "Invalid cursor"}), 400
+        created_at, listing_id = cursor
+        query = query.filter(db.or_(
+            Listing.created_at > created_at,
+            db.and_(Listing.created_at == created_at, Listing.id > listing_id)
+        ))
+    listings = query.order_by(Listing.created_at, Listing.id).limit(per_page + 1).all()
+    has_more = len(listings) > per_page
+    listings = listings[:per_page]
+
+    response = jsonify([
+        dict(listing.to_dict(), host_email=listing.host.email) for listing in listings
+    ])
+    response.headers['X-Per-Page'] = str(per_page)
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    if has_more:
+        response.headers['X-Next-Cursor'] = encode_moderation_cursor(listings[-1])
+    return response, 200
+
+# ==========Approve or reject many pending listings==========
+@admin_blueprint.route('/admin/moderation/bulk', methods=['PATCH'])
+@jwt_required()
+def bulk_moderate_listings():
+    current_user = User.query.get(get_jwt_identity())
+    if not current_user or current_user.role != 'admin':
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json() or {}
+    decisions = data.get('decisions')
+    if not isinstance(decisions, list) or not decisions:
+        return jsonify({"error": "decisions must be a non-empty list"}), 400
+    if len(decisions) > MODERATION_MAX_DECISIONS:
+        return jsonify({"error": f"At most {MODERATION_MAX_DECISIONS} decisions per request"}), 400
+
+    statuses = {}
+    for position, entry in enumerate(decisions):
+        listing_id = entry.get('id') if isinstance(entry, dict) else None
+        if not isinstance(listing_id, int) or isinstance(listing_id, bool):
+            return jsonify({"error": f"Decision {position}: id must be an integer"}), 400
+        if entry.get('decision') not in MODERATION_DECISIONS:
+            return jsonify({"error": f"Decision {position}: decision must be approve or reject"}), 400
+        statuses[listing_id] = MODERATION_DECISIONS[entry['decision']]
+
+    try:
+        # One UPDATE for every decision, only rows still pending are moved
+        result = db.session.execute(
+            db.update(Listing).where(
+                Listing.id.in_(list(statuses)),
+                Listing.status == 'pending'
+            ).values(status=db.case(statuses, value=Listing.id)).returning(Listing.id).execution_options(synchronize_session=False)
+        )
+        updated = {row[0] for row in result}
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to apply decisions", "details": str(e)}), 500
+
+    missing = statuses.keys() - updated
+    existing = set()
+    if missing:
+        existing = {listing_id for (listing_id,) in db.session.query(Listing.id).filter(Listing.id.in_(list(missing)))}
+
+    results = []
+    for listing_id, status in statuses.items():
+        if listing_id in updated:
+            outcome = status
+        elif listing_id in existing:
+            outcome = 'not_pending'
+        else:
+            outcome = 'not_found'
+        results.append({"id": listing_id, "outcome": outcome})
+    return jsonify({"updated": len(updated), "results": results}), 200
@@ -1,26 +1,96 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Booking, User, Listing
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from models import db, Booking, BookingArchive, User, Listing
+from availability import is_range_blocked, release_holds, stay_price, availability_cache
+from cache import host_dashboard_cache
+from analytics import deleted_stat_days, reroll_daily_stats
 from datetime import datetime
 
 booking_bp = Blueprint('booking', __name__)
 
+HISTORY_PAGE_SIZE = 50
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+def get_history_args():
+    when = request.args.get('when', 'all')
+    if when not in ('all', 'upcoming', 'past'):
+        return None, "when must be one of all, upcoming or past"
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', HISTORY_PAGE_SIZE, type=int)
+    if page < 1 or per_page < 1:
+        return None, "page and per_page must be positive integers"
+    return (when, page, min(per_page, HISTORY_MAX_PAGE_SIZE)), None
+
+
+def query_booking_history(user_id, when, page, per_page):
+    # Live and archived bookings in one UNION ALL, each side served by its
+    # (user_id, check_in) index, with the listing summary joined in so the
+    # client doesn't fetch each listing separately
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+    def history_select(model):
+        query = db.select(
+            model.id, model.listing_id, model.check_in, model.check_out, model.booking_status,
+            model.total_price, model.created_at, Listing.title, Listing.image_url, Listing.location
+        ).join(Listing, model.listing_id == Listing.id).where(model.user_id == user_id)
+        # A stay in progress is still upcoming until its check-out day
+        if when == 'upcoming':
+            query = query.where(model.check_out > today)
+        elif when == 'past':
+            query = query.where(model.check_out <= today)
+        return query
+
+    stays = db.union_all(history_select(Booking), history_select(BookingArchive)).subquery()
+    query = db.select(stays)
+    if when == 'upcoming':
+        query = query.order_by(stays.c.check_in.asc(), stays.c.id.asc())
+    else:
+        query = query.order_by(stays.c.check_in.desc(), stays.c.id.desc())
+
+    # Fetch one extra row to know whether there is a next page without a COUNT
+    rows = db.session.execute(query.offset((page - 1) * per_page).limit(per_page + 1)).all()
+    return rows[:per_page], len(rows) > per_page
+
+
+def history_response(result, has_more, page, per_page):
+    response = jsonify(result)
+    response.headers['X-Page'] = str(page)
+    response.headers['X-Per-Page'] = str(per_page)
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    return response, 200
+
+
+def listing_summary(listing_id, title, image_url, location):
+    return {
+        "id": listing_id,
+        "title": title,
+        "image_url": image_url,
+        "location": location
+    }
+
 # ========== Get all bookings for a user =========
 @booking_bp.route('/users/<int:user_id>/bookings', methods=['GET'])
 def get_user_bookings(user_id):
-    bookings = Booking.query.filter_by(user_id=user_id).all()
+    args, error = get_history_args()
+    if error:
+        return jsonify({"error": error}), 400
+    when, page, per_page = args
+
+    rows, has_more = query_booking_history(user_id, when, page, per_page)
     result = []
-    for booking in bookings:
+    for booking in rows:
         result.append({
             "id": booking.id,
             "listing_id": booking.listing_id,
+            "listing": listing_summary(booking.listing_id, booking.title, booking.image_url, booking.location),
             "check_in": booking.check_in,
             "check_out": booking.check_out,
             "status": booking.booking_status,
             "total_price": booking.total_price,
             "created_at": booking.created_at
         })
-    return jsonify(result), 200
+    return history_response(result, has_more, page, per_page)
 
 
 @booking_bp.route('/bookings/<int:booking_id>', methods=['GET'])
@@ -49,7 +119,6 @@ def create_booking():
     listing_id = data.get('listing_id')
     check_in = data.get('check_in')
     check_out = data.get('check_out')
-    total_price = data.get('total_price', 0)  # Add total_price handling
 
     if not (listing_id and check_in and check_out):
         return jsonify({'error': 'Missing required fields'}), 400
@@ -61,32 +130,32 @@ def create_booking():
     except ValueError:
         return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
 
-    # Optional: check if listing exists
-    listing = Listing.query.get(listing_id)
+    # Lock the listing row so a concurrent booking or hold can't slip past the check below
+    listing = Listing.query.filter_by(id=listing_id).with_for_update().first()
     if not listing:
         return jsonify({'error': 'Listing not found'}), 404
 
-    # Check for overlapping bookings
-    overlapping = Booking.query.filter(
-        Booking.listing_id == listing_id,
-        Booking.check_out > check_in_date,
-        Booking.check_in < check_out_date,
-        Booking.booking_status != 'cancelled'  # Don't consider cancelled bookings
-    ).first()
+    # Check for overlapping bookings (cancelled, rejected and expired ones don't count)
+    # and for other guests' checkout holds, always against the database
+    overlapping = is_range_blocked(listing_id, check_in_date, check_out_date, user_id=current_user_id)
     if overlapping:
         return jsonify({'error': 'Listing is not available for the selected dates.'}), 400
 
-    # Create booking
+    # Create booking, priced on the server so the host's nightly price
+    # overrides apply (a total_price sent by the client is ignored)
     new_booking = Booking(
         user_id=current_user_id,
         listing_id=listing_id,
         check_in=check_in_date,
         check_out=check_out_date,
-        total_price=total_price,
+        total_price=stay_price(listing, check_in_date, check_out_date),
         booking_status='pending'  # Set initial status
     )
     db.session.add(new_booking)
+    release_holds(listing_id, current_user_id)
     db.session.commit()
+    availability_cache.invalidate(new_booking.listing_id)
+    host_dashboard_cache.invalidate(listing.user_id)
 
     return jsonify({
         'id': new_booking.id,
@@ -103,20 +172,25 @@ def create_booking():
 @jwt_required()
 def get_bookings():
     current_user_id = int(get_jwt_identity())  # Convert string to int for consistency
-    bookings = Booking.query.filter_by(user_id=current_user_id).all()
-    
+    args, error = get_history_args()
+    if error:
+        return jsonify({"error": error}), 400
+    when, page, per_page = args
+
+    rows, has_more = query_booking_history(current_user_id, when, page, per_page)
     bookings_list = []
-    for booking in bookings:
+    for booking in rows:
         bookings_list.append({
             "id": booking.id,
             "listing_id": booking.listing_id,
+            "listing": listing_summary(booking.listing_id, booking.title, booking.image_url, booking.location),
             "check_in": booking.check_in.isoformat() if booking.check_in else None,
             "check_out": booking.check_out.isoformat() if booking.check_out else None,
             "total_price": booking.total_price,
             "booking_status": booking.booking_status
         })
     
-    return jsonify(bookings_list), 200
+    return history_response(bookings_list, has_more, page, per_page)
 
 
 @booking_bp.route('/bookings/<int:booking_id>', methods=['DELETE'])
@@ -146,8 +220,15 @@ def cancel_booking(booking_id):
     if booking.booking_status.lower() != 'pending':
         return jsonify({"error": f"Cannot cancel booking with status: {booking.booking_status}"}), 400
 
+    listing_id = booking.listing_id
+    host_id = booking.listing.user_id
+    stat_days = deleted_stat_days(booking_ids=[booking.id])
     db.session.delete(booking)
+    db.session.flush()
+    reroll_daily_stats(stat_days)
     db.session.commit()
+    availability_cache.invalidate(listing_id)
+    host_dashboard_cache.invalidate(host_id)
     return jsonify({"message": "Booking cancelled successfully!"}), 200
 
 # Check availability for a listing
@@ -159,14 +240,31 @@ def check_availability(listing_id):
     if not check_in or not check_out:
         return jsonify({'error': 'check_in and check_out dates required'}), 400
 
-    # Query for overlapping bookings
-    overlapping = Booking.query.filter(
-        Booking.listing_id == listing_id,
-        Booking.check_out > check_in,
-        Booking.check_in < check_out
-    ).first()
+    try:
+        check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
+        check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    # Repeated probes are answered from the in-memory snapshot of the listing.
+    # A signed-in caller's own holds don't count against them.
+    # An expired or revoked token is treated as an anonymous probe.
+    current_user_id = None
+    try:
+        if verify_jwt_in_request(optional=True):
+            current_user_id = int(get_jwt_identity())
+    except Exception:
+        pass
+    overlapping = availability_cache.is_blocked(listing_id, check_in_date, check_out_date, current_user_id)
 
     if overlapping:
         return jsonify({'available': False, 'error': 'Listing is not available for the selected dates.'}), 200
-    else:
-        return jsonify({'available': True, 'success': 'Listing is available for the selected dates.'}), 200
+
+    listing = Listing.query.get(listing_id)
+    if not listing:
+        return jsonify({'error': 'Listing not found'}), 404
+    return jsonify({
+        'available': True,
+        'success': 'Listing is available for the selected dates.',
+        'total_price': stay_price(listing, check_in_date, check_out_date)
+    }), 200
@@ -0,0 +1,415 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from models import db, Booking, Listing, CalendarBlock
+from availability import blocking_filter, merge_intervals, overlaps_any, availability_cache
+from views.host import require_host_role
+from datetime import datetime, timedelta
+import hashlib
+
+calendar_bp = Blueprint('calendar', __name__)
+
+MAX_IMPORT_EVENTS = 5000
+MAX_CALENDAR_RANGES = 366
+MAX_CALENDAR_RANGE_DAYS = 731
+
+
+def export_queries(listing_id, today):
+    # Current and future stays only, so the feed stays small however long
+    # the listing's history gets. Imported blocks aren't echoed back out.
+    bookings = db.session.query(Booking.id, Booking.check_in, Booking.check_out).filter(
+        Booking.listing_id == listing_id,
+        Booking.check_out >= today,
+        blocking_filter()
+    )
+    blocks = db.session.query(CalendarBlock.id, CalendarBlock.start_date, CalendarBlock.end_date).filter(
+        CalendarBlock.listing_id == listing_id,
+        CalendarBlock.end_date >= today.date(),
+        CalendarBlock.source != 'ical',
+        CalendarBlock.blocked.is_(True)
+    )
+    return bookings, blocks
+
+
+def day_number(column):
+    # A portable integer per calendar day, ordered like the dates themselves
+    return (db.extract('year', column) * 12 + db.extract('month', column)) * 31 + db.extract('day', column)
+
+
+def calendar_etag(listing_id, bookings, blocks, today):
+    # Aggregates over the exported rows, with each row's dates and status
+    # weighted by its id, change whenever a row joins or leaves the feed or
+    # is edited in place, so a revalidation costs two index-range aggregates
+    # and no rows
+    fingerprint = [listing_id, today.date().isoformat()]
+    for query, columns in (
+        (bookings, (Booking.id, Booking.check_in, Booking.check_out,
+                    db.case((Booking.booking_status == 'pending', 1), (Booking.booking_status == 'confirmed', 2), else_=3))),
+        (blocks, (CalendarBlock.id, CalendarBlock.start_date, CalendarBlock.end_date, db.literal(1)))
+    ):
+        row_id, start, end, status = columns
+        fingerprint.extend(query.with_entities(
+            db.func.count(row_id),
+            db.func.coalesce(db.func.sum(row_id), 0),
+            db.func.coalesce(db.func.sum(row_id * row_id), 0),
+            db.func.coalesce(db.func.sum(row_id * day_number(start)), 0),
+            db.func.coalesce(db.func.sum(row_id * day_number(end)), 0),
+            db.func.coalesce(db.func.sum(row_id * status), 0)
+        ).one())
+    return hashlib.sha1(repr(fingerprint).encode()).hexdigest()
+
+
+def ics_date(value):
+    return value.strftime('%Y%m%d')
+
+
+def ics_event(uid, start, end, summary, stamp):
+    return (
+        "BEGIN:VEVENT\r\n"
+        f"UID:{uid}\r\n"
+        f"DTSTAMP:{stamp}\r\n"
+        f"DTSTART;VALUE=DATE:{ics_date(start)}\r\n"
+        f"DTEND;VALUE=DATE:{ics_date(end)}\r\n"
+        f"SUMMARY:{summary}\r\n"
+        "END:VEVENT\r\n"
+    )
+
+
+def unfold_ics(text):
+    lines = []
+    for line in text.replace('\r\n', '\n').split('\n'):
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+
+def parse_ics_date(value):
+    return datetime.strptime(value.strip()[:8], '%Y%m%d').date()
+
+
+def parse_ics_events(text):
+    events = []
+    current = None
+    for line in unfold_ics(text):
+        if line == 'BEGIN:VEVENT':
+            current = {}
+        elif line == 'END:VEVENT' and current is not None:
+            events.append(current)
+            current = None
+        elif current is not None and ':' in line:
+            key, value = line.split(':', 1)
+            current[key.split(';', 1)[0].upper()] = value
+    return events
+
+
+# ========== Export a listing's calendar =========
+@calendar_bp.route('/listings/<int:listing_id>/calendar.ics', methods=['GET'])
+def export_calendar(listing_id):
+    listing = Listing.query.get(listing_id)
+    if not listing:
+        return jsonify({"error": "Listing not found"}), 404
+
+    today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+    bookings, blocks = export_queries(listing_id, today)
+    etag = calendar_etag(listing_id, bookings, blocks, today)
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    host = request.host.split(':')[0]
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+
+    def generate():
+        yield (
+            "BEGIN:VCALENDAR\r\n"
+            "VERSION:2.0\r\n"
+            "PRODID:-//Airbnb Booking API//Listing Calendar//EN\r\n"
+            "CALSCALE:GREGORIAN\r\n"
+        )
+        for booking_id, check_in, check_out in bookings.order_by(Booking.check_in).yield_per(500):
+            yield ics_event(f"booking-{booking_id}@{host}", check_in, check_out, "Reserved", stamp)
+        for block_id, start_date, end_date in blocks.order_by(CalendarBlock.start_date).yield_per(500):
+            yield ics_event(f"block-{block_id}@{host}", start_date, end_date, "Not available", stamp)
+        yield "END:VCALENDAR\r\n"
+
+    response = Response(stream_with_context(generate()), mimetype='text/calendar')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['Content-Disposition'] = f'attachment; filename="listing-{listing_id}.ics"'
+    return response
+
+
+# ========== Import blocked dates from an external calendar =========
+@calendar_bp.route('/host/listings/<int:listing_id>/calendar/import', methods=['POST'])
+@jwt_required()
+def import_calendar(listing_id):
+    user = require_host_role()
+    if not user:
+        return jsonify({"error": "Host access required"}), 403
+
+    listing = Listing.query.get(listing_id)
+    if not listing or listing.user_id != user.id:
+        return jsonify({"error": "Listing not found or unauthorized"}), 404
+
+    upload = request.files.get('file')
+    text = upload.read().decode('utf-8', errors='replace') if upload else request.get_data(as_text=True)
+    if 'BEGIN:VCALENDAR' not in text:
+        return jsonify({"error": "Expected an iCalendar (.ics) file"}), 400
+
+    events = parse_ics_events(text)
+    if len(events) > MAX_IMPORT_EVENTS:
+        return jsonify({"error": f"Too many events, the limit is {MAX_IMPORT_EVENTS}"}), 400
+
+    rows = []
+    skipped = []
+    for position, event in enumerate(events):
+        uid = event.get('UID')
+        try:
+            start = parse_ics_date(event['DTSTART'])
+            end = parse_ics_date(event['DTEND']) if 'DTEND' in event else start + timedelta(days=1)
+        except (KeyError, ValueError):
+            skipped.append({"event": position, "uid": uid, "error": "Invalid or missing DTSTART/DTEND"})
+            continue
+        if end <= start:
+            skipped.append({"event": position, "uid": uid, "error": "DTEND must be after DTSTART"})
+            continue
+        rows.append((position, {
+            "listing_id": listing_id,
+            "start_date": start,
+            "end_date": end,
+            "source": 'ical',
+            "external_uid": uid,
+            "summary": (event.get('SUMMARY') or '')[:200] or None,
+            "created_at": datetime.utcnow()
+        }))
+
+    if rows:
+        # Skip events imported by an earlier sync of the same feed
+        uids = [row['external_uid'] for _, row in rows if row['external_uid']]
+        existing = set()
+        if uids:
+            existing = {uid for (uid,) in db.session.query(CalendarBlock.external_uid).filter(
+                CalendarBlock.listing_id == listing_id,
+                CalendarBlock.external_uid.in_(uids)
+            )}
+
+        # One overlap query for the whole batch, then an in-memory check per event
+        span_start = min(row['start_date'] for _, row in rows)
+        span_end = max(row['end_date'] for _, row in rows)
+        booked = db.session.query(Booking.check_in, Booking.check_out).filter(
+            Booking.listing_id == listing_id,
+            Booking.check_out > span_start,
+            Booking.check_in < span_end,
+            blocking_filter()
+        ).all()
+        merged = merge_intervals((check_in.date(), check_out.date()) for check_in, check_out in booked)
+        starts = [interval[0] for interval in merged]
+
+        accepted = []
+        seen = set()
+        for position, row in rows:
+            uid = row['external_uid']
+            if uid and (uid in existing or uid in seen):
+                skipped.append({"event": position, "uid": uid, "error": "Already imported"})
+                continue
+            if overlaps_any(merged, starts, row['start_date'], row['end_date']):
+                skipped.append({"event": position, "uid": uid, "error": "Overlaps an existing booking"})
+                continue
+            if uid:
+                seen.add(uid)
+            accepted.append(row)
+        rows = accepted
+
+    try:
+        if rows:
+            db.session.execute(db.insert(CalendarBlock), rows)
+        db.session.commit()
+        availability_cache.invalidate(listing_id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to import calendar", "details": str(e)}), 500
+
+    return jsonify({
+        "message": f"Imported {len(rows)} blocked date ranges",
+        "imported": len(rows),
+        "skipped": skipped
+    }), 201
+
+
+def parse_calendar_ranges(ranges):
+    updates = []
+    for position, entry in enumerate(ranges):
+        if not isinstance(entry, dict):
+            return None, f"Range {position}: expected an object"
+        try:
+            start = datetime.strptime(entry['start'], '%Y-%m-%d').date()
+            end = datetime.strptime(entry['end'], '%Y-%m-%d').date()
+        except (KeyError, TypeError, ValueError):
+            return None, f"Range {position}: start and end must be YYYY-MM-DD dates"
+        if end <= start:
+            return None, f"Range {position}: end must be after start"
+        if (end - start).days > MAX_CALENDAR_RANGE_DAYS:
+            return None, f"Range {position}: a range cannot exceed {MAX_CALENDAR_RANGE_DAYS} days"
+        if 'blocked' not in entry and 'price' not in entry:
+            return None, f"Range {position}: set blocked and/or price"
+        if 'blocked' in entry and not isinstance(entry['blocked'], bool):
+            return None, f"Range {position}: blocked must be true or false"
+        price = entry.get('price')
+        if price is not None:
+            try:
+                price = float(price)
+            except (TypeError, ValueError):
+                return None, f"Range {position}: Invalid price format"
+            if price <= 0:
+                return None, f"Range {position}: price must be positive"
+        updates.append((start, end, entry.get('blocked'), 'price' in entry, price))
+    return updates, None
+
+
+def compact_days(days):
+    # Runs of consecutive days with the same (blocked, price) become one row
+    ranges = []
+    for day in sorted(days):
+        state = days[day]
+        if not state[0] and state[1] is None:
+            continue
+        if ranges and ranges[-1][1] == day and ranges[-1][2] == state:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1), state])
+    return ranges
+
+
+def calendar_range(block):
+    return {
+        "start": block.start_date.isoformat(),
+        "end": block.end_date.isoformat(),
+        "blocked": block.blocked,
+        "price": block.nightly_price
+    }
+
+
+# ========== Block dates and set nightly prices =========
+@calendar_bp.route('/host/listings/<int:listing_id>/calendar', methods=['PUT'])
+@jwt_required()
+def update_calendar(listing_id):
+    user = require_host_role()
+    if not user:
+        return jsonify({"error": "Host access required"}), 403
+
+    listing = Listing.query.get(listing_id)
+    if not listing or listing.user_id != user.id:
+        return jsonify({"error": "Listing not found or unauthorized"}), 404
+
+    data = request.get_json() or {}
+    ranges = data.get('ranges')
+    if not isinstance(ranges, list) or not ranges:
+        return jsonify({"error": "ranges must be a non-empty list"}), 400
+    if len(ranges) > MAX_CALENDAR_RANGES:
+        return jsonify({"error": f"At most {MAX_CALENDAR_RANGES} ranges per request"}), 400
+    updates, error = parse_calendar_ranges(ranges)
+    if error:
+        return jsonify({"error": error}), 400
+
+    span_start = min(start for start, _, _, _, _ in updates)
+    span_end = max(end for _, end, _, _, _ in updates)
+
+    # Dates can't be blocked under a stay that already holds them
+    blocking = [(start, end) for start, end, blocked, _, _ in updates if blocked]
+    if blocking:
+        booked = db.session.query(Booking.check_in, Booking.check_out).filter(
+            Booking.listing_id == listing_id,
+            Booking.check_out > span_start,
+            Booking.check_in < span_end,
+            blocking_filter()
+        ).all()
+        merged = merge_intervals((check_in.date(), check_out.date()) for check_in, check_out in booked)
+        starts = [interval[0] for interval in merged]
+        conflicts = [
+            {"start": start.isoformat(), "end": end.isoformat()}
+            for start, end in blocking if overlaps_any(merged, starts, start, end)
+        ]
+        if conflicts:
+            return jsonify({"error": "Some ranges overlap existing bookings", "conflicts": conflicts}), 409
+
+    # Host ranges overlapping or touching the span are rewritten together, so
+    # neighbours with the same state merge into a single row
+    existing = CalendarBlock.query.filter(
+        CalendarBlock.listing_id == listing_id,
+        CalendarBlock.source == 'host',
+        CalendarBlock.end_date >= span_start,
+        CalendarBlock.start_date <= span_end
+    ).all()
+    days = {}
+    for block in existing:
+        for offset in range((block.end_date - block.start_date).days):
+            days[block.start_date + timedelta(days=offset)] = (block.blocked, block.nightly_price)
+    for start, end, blocked, has_price, price in updates:
+        for offset in range((end - start).days):
+            day = start + timedelta(days=offset)
+            current_blocked, current_price = days.get(day, (False, None))
+            days[day] = (
+                current_blocked if blocked is None else blocked,
+                price if has_price else current_price
+            )
+
+    now = datetime.utcnow()
+    rows = [{
+        "listing_id": listing_id,
+        "start_date": start,
+        "end_date": end,
+        "source": 'host',
+        "blocked": blocked,
+        "nightly_price": price,
+        "created_at": now
+    } for start, end, (blocked, price) in compact_days(days)]
+
+    try:
+        if existing:
+            db.session.execute(db.delete(CalendarBlock).where(
+                CalendarBlock.id.in_([block.id for block in existing])
+            ))
+        if rows:
+            db.session.execute(db.insert(CalendarBlock), rows)
+        db.session.commit()
+        availability_cache.invalidate(listing_id)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to update calendar", "details": str(e)}), 500
+
+    return jsonify({
+        "message": "Calendar updated",
+        "ranges": [{
+            "start": row["start_date"].isoformat(),
+            "end": row["end_date"].isoformat(),
+            "blocked": row["blocked"],
+            "price": row["nightly_price"]
+        } for row in rows]
+    }), 200
+
+
+# ========== Get a listing's blocked dates and prices =========
+@calendar_bp.route('/host/listings/<int:listing_id>/calendar', methods=['GET'])
+@jwt_required()
+def get_calendar(listing_id):
+    user = require_host_role()
+    if not user:
+        return jsonify({"error": "Host access required"}), 403
+
+    listing = Listing.query.get(listing_id)
+    if not listing or listing.user_id != user.id:
+        return jsonify({"error": "Listing not found or unauthorized"}), 404
+
+    today = datetime.utcnow().date()
+    blocks = CalendarBlock.query.filter(
+        CalendarBlock.listing_id == listing_id,
+        CalendarBlock.end_date > today
+    ).order_by(CalendarBlock.start_date).all()
+    return jsonify({
+        "listing_id": listing_id,
+        "price_per_night": listing.price_per_night,
+        "ranges": [dict(calendar_range(block), source=block.source) for block in blocks]
+    }), 200
@@ -0,0 +1,110 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from models import db, Booking, Listing, User
+from ledger import EARNING_STATUSES
+from views.host import require_host_role
+from datetime import datetime
+import csv
+import io
+import json
+
+export_bp = Blueprint('export', __name__)
+
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_COLUMNS = (
+    'booking_id', 'listing_id', 'listing_title', 'guest_id', 'guest_name', 'check_in', 'check_out',
+    'nights', 'booking_status', 'total_price', 'earnings', 'created_at'
+)
+
+
+def export_rows(host_id, date_from, date_to):
+    # Plain column tuples rather than ORM objects, so nothing accumulates in
+    # the session while the rows stream out
+    query = db.session.query(
+        Booking.id, Booking.listing_id, Listing.title, Booking.user_id, User.username,
+        Booking.check_in, Booking.check_out, Booking.booking_status, Booking.total_price, Booking.created_at
+    ).join(Listing, Booking.listing_id == Listing.id).outerjoin(
+        User, Booking.user_id == User.id
+    ).filter(Listing.user_id == host_id)
+    if date_from:
+        query = query.filter(Booking.check_out > date_from)
+    if date_to:
+        query = query.filter(Booking.check_in < date_to)
+    # stream_results asks Postgres for a server-side cursor, yield_per fetches
+    # from it in chunks
+    query = query.order_by(Booking.check_in, Booking.id).execution_options(stream_results=True)
+    for row in query.yield_per(EXPORT_CHUNK_SIZE):
+        booking_id, listing_id, title, guest_id, guest_name, check_in, check_out, status, total_price, created_at = row
+        yield {
+            'booking_id': booking_id,
+            'listing_id': listing_id,
+            'listing_title': title,
+            'guest_id': guest_id,
+            'guest_name': guest_name,
+            'check_in': check_in.date().isoformat() if check_in else None,
+            'check_out': check_out.date().isoformat() if check_out else None,
+            'nights': (check_out - check_in).days if check_in and check_out else None,
+            'booking_status': status,
+            'total_price': total_price,
+            'earnings': total_price if status in EARNING_STATUSES else 0,
+            'created_at': created_at.isoformat() if created_at else None
+        }
+
+
+def generate_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    # The header goes out before the query runs, then rows in chunks
+    writer.writeheader()
+    yield flush()
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield flush()
+    yield flush()
+
+
+def generate_ndjson(rows):
+    # Nothing precedes the first row, so an empty chunk starts the response
+    # before the query runs, as the CSV header does
+    yield ''
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+# ========== Export host bookings and earnings =========
+@export_bp.route('/host/export', methods=['GET'])
+@jwt_required()
+def export_host_bookings():
+    user = require_host_role()
+    if not user:
+        return jsonify({"error": "Host access required"}), 403
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    try:
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        date_from = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+        date_to = datetime.strptime(date_to, '%Y-%m-%d') if date_to else None
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+
+    rows = export_rows(user.id, date_from, date_to)
+    if export_format == 'csv':
+        body, mimetype = generate_csv(rows), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(rows), 'application/x-ndjson'
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="bookings-{user.id}.{export_format}"'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,82 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Listing, BookingHold
+from availability import is_range_blocked, availability_cache
+from datetime import datetime, timedelta
+
+hold_bp = Blueprint('hold', __name__)
+
+
+# ========== Hold dates while the guest checks out =========
+@hold_bp.route('/listings/<int:listing_id>/holds', methods=['POST'])
+@jwt_required()
+def create_hold(listing_id):
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json()
+    check_in = data.get('check_in')
+    check_out = data.get('check_out')
+    if not check_in or not check_out:
+        return jsonify({'error': 'check_in and check_out dates required'}), 400
+
+    try:
+        check_in_date = datetime.strptime(check_in, '%Y-%m-%d').date()
+        check_out_date = datetime.strptime(check_out, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+    if check_out_date <= check_in_date:
+        return jsonify({'error': 'Check-out must be after check-in'}), 400
+    if check_in_date < datetime.utcnow().date():
+        return jsonify({'error': 'Cannot hold dates in the past'}), 400
+
+    # Lock the listing row so two guests can't both pass the check below
+    listing = Listing.query.filter_by(id=listing_id).with_for_update().first()
+    if not listing:
+        return jsonify({'error': 'Listing not found'}), 404
+
+    # A guest holds one date range per listing, picking new dates replaces it
+    BookingHold.query.filter_by(listing_id=listing_id, user_id=current_user_id).delete()
+
+    if is_range_blocked(listing_id, check_in_date, check_out_date, user_id=current_user_id):
+        db.session.rollback()
+        return jsonify({'error': 'Listing is not available for the selected dates.'}), 400
+
+    minutes = current_app.config.get('CHECKOUT_HOLD_MINUTES', 10)
+    hold = BookingHold(
+        listing_id=listing_id,
+        user_id=current_user_id,
+        check_in=check_in_date,
+        check_out=check_out_date,
+        expires_at=datetime.utcnow() + timedelta(minutes=minutes)
+    )
+    try:
+        db.session.add(hold)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to hold dates', 'details': str(e)}), 500
+    availability_cache.invalidate(listing_id)
+
+    return jsonify({
+        'id': hold.id,
+        'listing_id': hold.listing_id,
+        'check_in': hold.check_in.isoformat(),
+        'check_out': hold.check_out.isoformat(),
+        'expires_at': hold.expires_at.isoformat()
+    }), 201
+
+
+# ========== Release a hold =========
+@hold_bp.route('/holds/<int:hold_id>', methods=['DELETE'])
+@jwt_required()
+def release_hold(hold_id):
+    current_user_id = int(get_jwt_identity())
+    hold = BookingHold.query.get(hold_id)
+    if not hold or hold.user_id != current_user_id:
+        return jsonify({'error': 'Hold not found or unauthorized'}), 404
+
+    listing_id = hold.listing_id
+    db.session.delete(hold)
+    db.session.commit()
+    availability_cache.invalidate(listing_id)
+    return jsonify({'message': 'Hold released'}), 200
@@ -1,10 +1,131 @@
 from flask import Blueprint, jsonify, request
-from models import Booking, Listing, User, db
+from models import Booking, Listing, User, HostEarnings, db
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from availability import is_pending_expired, availability_cache, pending_cutoff
+from occupancy import occupancy_series
+from rollups import record_booking_status_change
+from cache import host_dashboard_cache, listing_insights_cache
+from insights import listing_insights
+from locations import resolve_locations
+from leaderboards import rebuild_leaderboards, remove_from_leaderboards
+from analytics import deleted_stat_days, reroll_daily_stats
+from sqlalchemy.orm import contains_eager, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime, timedelta
+import base64
+import csv
+import io
+import json
 
 host_blueprint = Blueprint('host', __name__)
 
+INBOX_PAGE_SIZE = 50
+INBOX_MAX_PAGE_SIZE = 100
+BOOKING_STATUSES = ('pending', 'confirmed', 'completed', 'rejected', 'cancelled', 'expired')
+BULK_MAX_BOOKINGS = 500
+MAX_IMPORT_LISTINGS = 10000
+IMPORT_BATCH_SIZE = 1000
+# Statuses a bulk decision may move a booking out of, per target status
+BULK_TRANSITIONS = {
+    'confirmed': ('pending',),
+    'rejected': ('pending', 'confirmed'),
+}
+
+
+def encode_inbox_cursor(booking):
+    # Opaque to the client: the (check_in, id) of the last row on the page
+    raw = f"{booking.check_in.isoformat()}|{booking.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_inbox_cursor(cursor):
+    try:
+        check_in, booking_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(check_in), int(booking_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def get_inbox_args():
+    statuses = [status for status in request.args.get('status', '').split(',') if status]
+    for status in statuses:
+        if status not in BOOKING_STATUSES:
+            return None, f"status must be one of {', '.join(BOOKING_STATUSES)}"
+    try:
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        date_from = datetime.strptime(date_from, '%Y-%m-%d') if date_from else None
+        date_to = datetime.strptime(date_to, '%Y-%m-%d') if date_to else None
+    except ValueError:
+        return None, "Invalid date format. Use YYYY-MM-DD"
+    if date_from and date_to and date_to <= date_from:
+        return None, "to must be after from"
+    cursor = request.args.get('cursor')
+    if cursor:
+        cursor = decode_inbox_cursor(cursor)
+        if not cursor:
+            return None, "Invalid cursor"
+    per_page = request.args.get('per_page', INBOX_PAGE_SIZE, type=int)
+    if per_page < 1:
+        return None, "per_page must be a positive integer"
+    return (statuses, date_from, date_to, cursor, min(per_page, INBOX_MAX_PAGE_SIZE)), None
+
+
+def parse_listing_fields(data):
+    # Check required fields - make amenities and image_url optional
+    required_fields = ['title', 'description', 'price_per_night', 'location']
+    for field in required_fields:
+        if field not in data or data[field] is None or not str(data[field]).strip():
+            return None, f"{field} is required"
+
+    # Optional fields with defaults
+    amenities = data.get('amenities') or ''
+    image_url = data.get('image_url') or ''
+
+    # Convert amenities to string if it's a list
+    if isinstance(amenities, list):
+        amenities = ', '.join(str(amenity) for amenity in amenities)
+
+    try:
+        price_per_night = float(data['price_per_night'])
+    except (TypeError, ValueError):
+        return None, "Invalid price format"
+
+    return {
+        'title': str(data['title']).strip(),
+        'description': str(data['description']).strip(),
+        'location': str(data['location']).strip(),
+        'price_per_night': price_per_night,
+        'amenities': str(amenities).strip(),
+        'image_url': str(image_url).strip()
+    }, None
+
+
+def check_listing_lengths(fields):
+    # One oversized value would otherwise fail the whole insert batch
+    for field, limit in (('title', 100), ('location', 100), ('image_url', 300)):
+        if len(fields[field]) > limit:
+            return f"{field} must be at most {limit} characters"
+    return None
+
+
+def read_listing_records(text, import_format):
+    # Returns (line number, record) pairs so errors point at the source row
+    if import_format == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            return None, "CSV file is empty"
+        return [(reader.line_num, row) for row in reader], None
+    records = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            records.append((line_number, json.loads(line)))
+        except ValueError:
+            records.append((line_number, None))
+    return records, None
+
 
 def require_host_role():
     identity = get_jwt_identity()
@@ -24,31 +145,17 @@ def create_listing():
     if not user:
         return jsonify({"error": "Host access required"}), 403
 
-    # Check required fields - make amenities and image_url optional
-    required_fields = ['title', 'description', 'price_per_night', 'location']
-    for field in required_fields:
-        if field not in data or not str(data[field]).strip():
-            return jsonify({"error": f"{field} is required"}), 400
-
-    # Optional fields with defaults
-    amenities = data.get('amenities', '')
-    image_url = data.get('image_url', '')
-    
-    # Convert amenities to string if it's a list
-    if isinstance(amenities, list):
-        amenities = ', '.join(amenities)
+    fields, error = parse_listing_fields(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     try:
         new_listing = Listing(
             user_id=user.id,
-            title=str(data['title']).strip(),
-            description=str(data['description']).strip(),
-            location=str(data['location']).strip(),
-            price_per_night=float(data['price_per_night']),
-            amenities=str(amenities).strip(),
-            image_url=str(image_url).strip(),
             status='pending',  # All new listings start as pending for admin approval
-            created_at=datetime.utcnow()
+            created_at=datetime.utcnow(),
+            location_id=resolve_locations([fields['location']]).get(fields['location']),
+            **fields
         )
 
         db.session.add(new_listing)
@@ -70,13 +177,70 @@ def create_listing():
             }
         }), 201
         
-    except ValueError as e:
-        return jsonify({"error": "Invalid price format"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Failed to save listing", "details": str(e)}), 500
 
 
+# ========== Import listings in bulk =========
+@host_blueprint.route('/host/listings/import', methods=['POST'])
+@jwt_required()
+def import_listings():
+    user = require_host_role()
+    if not user:
+        return jsonify({"error": "Host access required"}), 403
+
+    upload = request.files.get('file')
+    text = upload.read().decode('utf-8-sig', errors='replace') if upload else request.get_data(as_text=True)
+    import_format = request.args.get('format')
+    if not import_format:
+        filename = upload.filename if upload else ''
+        is_jsonl = filename.endswith(('.jsonl', '.ndjson')) or 'ndjson' in (request.mimetype or '')
+        import_format = 'jsonl' if is_jsonl or text.lstrip().startswith('{') else 'csv'
+    if import_format not in ('csv', 'jsonl'):
+        return jsonify({"error": "format must be csv or jsonl"}), 400
+
+    records, error = read_listing_records(text, import_format)
+    if error:
+        return jsonify({"error": error}), 400
+    if len(records) > MAX_IMPORT_LISTINGS:
+        return jsonify({"error": f"Too many rows, the limit is {MAX_IMPORT_LISTINGS}"}), 400
+
+    now = datetime.utcnow()
+    rows = []
+    errors = []
+    for line, data in records:
+        if not isinstance(data, dict):
+            errors.append({"row": line, "error": "Expected a JSON object"})
+            continue
+        fields, error = parse_listing_fields(data)
+        if not error:
+            error = check_listing_lengths(fields)
+        if error:
+            errors.append({"row": line, "error": error})
+            continue
+        rows.append(dict(fields, user_id=user.id, status='pending', created_at=now))
+
+    try:
+        # Distinct spellings are resolved once for the whole file
+        location_ids = resolve_locations([row['location'] for row in rows])
+        for row in rows:
+            row['location_id'] = location_ids.get(row['location'])
+        # executemany per batch keeps each statement's parameter set bounded
+        for offset in range(0, len(rows), IMPORT_BATCH_SIZE):
+            db.session.execute(db.insert(Listing), rows[offset:offset + IMPORT_BATCH_SIZE])
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to import listings", "details": str(e)}), 500
+
+    return jsonify({
+        "message": f"Imported {len(rows)} listings. They will be visible once approved by admin.",
+        "imported": len(rows),
+        "errors": errors
+    }), 201
+
+
 # ========== update bookings =========
 @host_blueprint.route('/host/bookings/<int:booking_id>', methods=['PUT'])
 @jwt_required()
@@ -91,8 +255,13 @@ def update_booking(booking_id):
     if booking.listing.user_id != user.id:
         return jsonify({"error": "Unauthorized"}), 403
     data = request.json
+    previous_status = booking.booking_status
     booking.booking_status = data.get('booking_status', booking.booking_status)
+    record_booking_status_change(booking, previous_status)
     db.session.commit()
+    availability_cache.invalidate(booking.listing_id)
+    listing_insights_cache.invalidate_group(booking.listing_id)
+    host_dashboard_cache.invalidate(user.id)
     return jsonify({"success": "Booking updated successfully!"}), 200
 
 # ========== Get Bookings made on their listings =========
@@ -103,10 +272,34 @@ def get_host_bookings():
     if not user:
         return jsonify({"error": "Host access required"}), 403
         
-    listings = Listing.query.filter_by(user_id=user.id).all()
-    listing_ids = [listing.id for listing in listings]
-    bookings = Booking.query.filter(Booking.listing_id.in_(listing_ids)).all()
-    
+    args, error = get_inbox_args()
+    if error:
+        return jsonify({"error": error}), 400
+    statuses, date_from, date_to, cursor, per_page = args
+
+    # One joined query: the listing comes from the join that scopes the
+    # bookings to this host and the guest is loaded alongside, so rendering
+    # a page never goes back to the database
+    query = Booking.query.join(Listing, Booking.listing_id == Listing.id).options(
+        contains_eager(Booking.listing), joinedload(Booking.guest)
+    ).filter(Listing.user_id == user.id)
+    if statuses:
+        query = query.filter(Booking.booking_status.in_(statuses))
+    # Stays overlapping the window, served by (listing_id, booking_status, check_in)
+    if date_from:
+        query = query.filter(Booking.check_out > date_from)
+    if date_to:
+        query = query.filter(Booking.check_in < date_to)
+    if cursor:
+        cursor_check_in, cursor_id = cursor
+        query = query.filter(db.or_(
+            Booking.check_in < cursor_check_in,
+            db.and_(Booking.check_in == cursor_check_in, Booking.id < cursor_id)
+        ))
+    bookings = query.order_by(Booking.check_in.desc(), Booking.id.desc()).limit(per_page + 1).all()
+    has_more = len(bookings) > per_page
+    bookings = bookings[:per_page]
+
     booking_list = []
     for booking in bookings:
         booking_data = {
@@ -122,8 +315,13 @@ def get_host_bookings():
             'created_at': booking.created_at.isoformat() if booking.created_at else None
         }
         booking_list.append(booking_data)
-    
-    return jsonify(booking_list), 200
+
+    response = jsonify(booking_list)
+    response.headers['X-Per-Page'] = str(per_page)
+    response.headers['X-Has-More'] = 'true' if has_more else 'false'
+    if has_more:
+        response.headers['X-Next-Cursor'] = encode_inbox_cursor(bookings[-1])
+    return response, 200
 
 #  ========== Track Total Earnings =========
 @host_blueprint.route('/host/total-earnings', methods=['GET'])
@@ -133,14 +331,96 @@ def track_total_earnings():
     if not user:
         return jsonify({"error": "Host access required"}), 403
         
-    listings = Listing.query.filter_by(user_id=user.id).all()
-    listing_ids = [listing.id for listing in listings]
-    bookings = Booking.query.filter(Booking.listing_id.in_(
-        listing_ids), Booking.booking_status == 'confirmed').all()
-    total_earnings = sum(booking.total_price for booking in bookings)
+    # Read from the host_earnings ledger, one row per listing and month
+    total_earnings = db.session.query(
+        db.func.coalesce(db.func.sum(HostEarnings.earnings), 0)
+    ).filter(HostEarnings.host_id == user.id).scalar()
     return jsonify({'total_earnings': total_earnings}), 200
 
 
+def build_host_dashboard(host_id, upcoming_limit=10):
+    now = datetime.utcnow()
+    pending = db.session.query(db.func.count(Booking.id)).join(
+        Listing, Booking.listing_id == Listing.id
+    ).filter(
+        Listing.user_id == host_id,
+        Booking.booking_status == 'pending',
+        Booking.created_at >= pending_cutoff(now)
+    ).scalar_subquery()
+
+    # Round trip 1: ledger rows per listing and month (O(listings x months),
+    # not O(bookings)) with the pending request count alongside. The outer
+    # join keeps listings that haven't earned anything yet.
+    ledger = db.session.query(
+        Listing.id, Listing.title, HostEarnings.month, HostEarnings.earnings, HostEarnings.bookings, pending
+    ).outerjoin(HostEarnings, db.and_(
+        HostEarnings.listing_id == Listing.id,
+        HostEarnings.host_id == host_id
+    )).filter(Listing.user_id == host_id).all()
+
+    by_listing = {}
+    by_month = {}
+    total_earnings = 0
+    pending_requests = 0
+    for listing_id, title, month, earnings, count, pending_count in ledger:
+        pending_requests = pending_count or 0
+        listing_entry = by_listing.setdefault(listing_id, {
+            'listing_id': listing_id, 'title': title, 'earnings': 0, 'bookings': 0
+        })
+        if month is None or not count:
+            continue
+        key = month.strftime('%Y-%m')
+        month_entry = by_month.setdefault(key, {'month': key, 'earnings': 0, 'bookings': 0})
+        listing_entry['earnings'] += earnings
+        listing_entry['bookings'] += count
+        month_entry['earnings'] += earnings
+        month_entry['bookings'] += count
+        total_earnings += earnings
+
+    # Round trip 2: the next confirmed arrivals with guest and listing names
+    upcoming = db.session.query(
+        Booking.id, Booking.listing_id, Listing.title, Booking.user_id, User.username,
+        Booking.check_in, Booking.check_out, Booking.total_price
+    ).join(Listing, Booking.listing_id == Listing.id).join(User, Booking.user_id == User.id).filter(
+        Listing.user_id == host_id,
+        Booking.booking_status == 'confirmed',
+        Booking.check_in >= datetime.combine(now.date(), datetime.min.time())
+    ).order_by(Booking.check_in).limit(upcoming_limit).all()
+
+    return {
+        'total_earnings': total_earnings,
+        'earnings_by_listing': sorted(by_listing.values(), key=lambda entry: -entry['earnings']),
+        'earnings_by_month': [by_month[key] for key in sorted(by_month)],
+        'pending_requests': pending_requests,
+        'upcoming_checkins': [{
+            'booking_id': booking_id,
+            'listing_id': listing_id,
+            'listing_title': title,
+            'guest_id': guest_id,
+            'guest_name': guest_name,
+            'check_in': check_in.isoformat(),
+            'check_out': check_out.isoformat(),
+            'total_price': total_price
+        } for booking_id, listing_id, title, guest_id, guest_name, check_in, check_out, total_price in upcoming],
+        'generated_at': now.isoformat()
+    }
+
+
+# ========== Host dashboard =========
+@host_blueprint.route('/host/dashboard', methods=['GET'])
+@jwt_required()
+def get_host_dashboard():
+    user = require_host_role()
+    if not user:
+        return jsonify({"error": "Host access required"}), 403
+
+    dashboard = host_dashboard_cache.get(user.id)
+    if dashboard is None:
+        dashboard = build_host_dashboard(user.id)
+        host_dashboard_cache.set(user.id, dashboard)
+    return jsonify(dashboard), 200
+
+
 # ========== Edit Listings =========
 @host_blueprint.route('/host/<int:listing_id>', methods=['PUT'])
 @jwt_required()
@@ -168,6 +448,8 @@ def edit_listing(listing_id):
         listing.status = 'pending'
     
     try:
+        if 'location' in data:
+            listing.location_id = resolve_locations([listing.location]).get(listing.location)
         db.session.commit()
         return jsonify({"message": "Listing updated successfully! It will be reviewed by admin."}), 200
     except Exception as e:
@@ -188,8 +470,18 @@ def delete_listing(listing_id):
         return jsonify({"error": "Listing not found or unauthorized"}), 404
     
     try:
+        # Its bookings, reviews, calendar rows and rollups follow through
+        # ON DELETE CASCADE
+        stat_days = deleted_stat_days(listing_ids=[listing_id])
         db.session.delete(listing)
+        db.session.flush()
+        remove_from_leaderboards([listing_id])
+        rebuild_leaderboards([user.id])
+        reroll_daily_stats(stat_days)
         db.session.commit()
+        availability_cache.invalidate(listing_id)
+        host_dashboard_cache.invalidate(user.id)
+        listing_insights_cache.invalidate_group(listing_id)
         return jsonify({"message": "Listing deleted successfully!"}), 200
     except Exception as e:
         db.session.rollback()
@@ -232,10 +524,19 @@ def approve_booking(booking_id):
     # Check if the booking belongs to host's listing
     if booking.listing.user_id != user.id:
         return jsonify({"error": "Unauthorized - This booking is not for your listing"}), 403
+
+    # Stale requests no longer hold the dates, so confirming them could double book
+    if booking.booking_status == 'expired' or is_pending_expired(booking):
+        return jsonify({"error": "Booking request has expired"}), 400
     
     try:
+        previous_status = booking.booking_status
         booking.booking_status = 'confirmed'
+        record_booking_status_change(booking, previous_status)
         db.session.commit()
+        availability_cache.invalidate(booking.listing_id)
+        listing_insights_cache.invalidate_group(booking.listing_id)
+        host_dashboard_cache.invalidate(user.id)
         
         return jsonify({
             "message": "Booking approved successfully!",
@@ -265,8 +566,13 @@ def reject_booking(booking_id):
         return jsonify({"error": "Unauthorized - This booking is not for your listing"}), 403
     
     try:
+        previous_status = booking.booking_status
         booking.booking_status = 'rejected'
+        record_booking_status_change(booking, previous_status)
         db.session.commit()
+        availability_cache.invalidate(booking.listing_id)
+        listing_insights_cache.invalidate_group(booking.listing_id)
+        host_dashboard_cache.invalidate(user.id)
         
         return jsonify({
             "message": "Booking rejected successfully!",
@@ -279,6 +585,85 @@ def reject_booking(booking_id):
         db.session.rollback()
         return jsonify({"error": "Failed to reject booking", "details": str(e)}), 500
 
+# ========== Bulk Approve/Reject Bookings =========
+@host_blueprint.route('/host/bookings/bulk', methods=['PATCH'])
+@jwt_required()
+def bulk_update_bookings():
+    user = require_host_role()
+    if not user:
+        return jsonify({"error": "Host access required"}), 403
+
+    data = request.get_json() or {}
+    booking_ids = data.get('booking_ids')
+    status = data.get('status')
+    if status not in BULK_TRANSITIONS:
+        return jsonify({"error": "status must be one of confirmed or rejected"}), 400
+    if not isinstance(booking_ids, list) or not booking_ids:
+        return jsonify({"error": "booking_ids must be a non-empty list"}), 400
+    if len(booking_ids) > BULK_MAX_BOOKINGS:
+        return jsonify({"error": f"At most {BULK_MAX_BOOKINGS} bookings per request"}), 400
+    # JSON true/false would otherwise pass as ids 1 and 0
+    if not all(isinstance(booking_id, int) and not isinstance(booking_id, bool) for booking_id in booking_ids):
+        return jsonify({"error": "booking_ids must be integers"}), 400
+
+    # Ownership for every id in one join, bookings on other hosts' listings
+    # come back the same as ids that don't exist. The rows stay locked until
+    # the commit, so the statuses read here are the ones being replaced.
+    bookings = Booking.query.join(Listing, Booking.listing_id == Listing.id).options(
+        contains_eager(Booking.listing)
+    ).filter(Booking.id.in_(booking_ids), Listing.user_id == user.id).with_for_update(of=Booking).all()
+    by_id = {booking.id: booking for booking in bookings}
+
+    outcomes = {}
+    eligible = []
+    for booking_id in booking_ids:
+        booking = by_id.get(booking_id)
+        if not booking:
+            outcomes[booking_id] = 'not_found'
+        elif booking.booking_status == status:
+            outcomes[booking_id] = 'unchanged'
+        elif status == 'confirmed' and (booking.booking_status == 'expired' or is_pending_expired(booking)):
+            outcomes[booking_id] = 'expired'
+        elif booking.booking_status not in BULK_TRANSITIONS[status]:
+            outcomes[booking_id] = 'invalid_transition'
+        else:
+            eligible.append(booking_id)
+
+    try:
+        updated = set()
+        if eligible:
+            # The status guard also covers databases without row locks, where
+            # another request may have moved a row since it was read above
+            result = db.session.execute(
+                db.update(Booking).where(
+                    Booking.id.in_(eligible),
+                    Booking.booking_status.in_(BULK_TRANSITIONS[status])
+                ).values(booking_status=status).returning(Booking.id).execution_options(synchronize_session=False)
+            )
+            updated = {row[0] for row in result}
+            for booking_id in updated:
+                booking = by_id[booking_id]
+                previous_status = booking.booking_status
+                set_committed_value(booking, 'booking_status', status)
+                record_booking_status_change(booking, previous_status)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to update bookings", "details": str(e)}), 500
+
+    for booking_id in eligible:
+        outcomes[booking_id] = status if booking_id in updated else 'conflict'
+    for listing_id in {by_id[booking_id].listing_id for booking_id in updated}:
+        availability_cache.invalidate(listing_id)
+        listing_insights_cache.invalidate_group(listing_id)
+    if updated:
+        host_dashboard_cache.invalidate(user.id)
+
+    return jsonify({
+        "updated": len(updated),
+        "results": [{"id": booking_id, "outcome": outcomes[booking_id]} for booking_id in dict.fromkeys(booking_ids)]
+    }), 200
+
 # ========== Update Listing Status =========
 @host_blueprint.route('/host/listings/<int:listing_id>/status', methods=['PATCH'])
 @jwt_required()
@@ -310,7 +695,76 @@ def update_listing_status(listing_id):
         db.session.rollback()
         return jsonify({"error": "Failed to update status", "details": str(e)}), 500
 
+# ========== Daily occupancy for a listing =========
+@host_blueprint.route('/host/listings/<int:listing_id>/occupancy', methods=['GET'])
+@jwt_required()
+def get_listing_occupancy(listing_id):
+    user = User.query.get(get_jwt_identity())
+    if not user or user.role not in ('host', 'admin'):
+        return jsonify({"error": "Host access required"}), 403
 
+    listing = Listing.query.get(listing_id)
+    if not listing or (user.role == 'host' and listing.user_id != user.id):
+        return jsonify({"error": "Listing not found or unauthorized"}), 404
+
+    today = datetime.utcnow().date()
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if 'from' in request.args else today - timedelta(days=90)
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if 'to' in request.args else today + timedelta(days=90)
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if end <= start:
+        return jsonify({"error": "to must be after from"}), 400
+    if (end - start).days > 731:
+        return jsonify({"error": "Date range cannot exceed two years"}), 400
+
+    rows = {day: (booked, revenue) for day, booked, revenue in occupancy_series(listing_id, start, end)}
+    days = []
+    booked_nights = 0
+    total_revenue = 0
+    for offset in range((end - start).days):
+        day = start + timedelta(days=offset)
+        booked, revenue = rows.get(day, (False, 0))
+        booked_nights += 1 if booked else 0
+        total_revenue += revenue
+        days.append({'date': day.isoformat(), 'booked': bool(booked), 'revenue': revenue})
+
+    return jsonify({
+        'listing_id': listing_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'booked_nights': booked_nights,
+        'occupancy_rate': booked_nights / len(days),
+        'revenue': total_revenue,
+        'days': days
+    }), 200
 
+# ========== Listing Performance Insights =========
+@host_blueprint.route('/host/listings/<int:listing_id>/insights', methods=['GET'])
+@jwt_required()
+def get_listing_insights(listing_id):
+    user = User.query.get(get_jwt_identity())
+    if not user or user.role not in ('host', 'admin'):
+        return jsonify({"error": "Host access required"}), 403
+
+    listing = Listing.query.get(listing_id)
+    if not listing or (user.role == 'host' and listing.user_id != user.id):
+        return jsonify({"error": "Listing not found or unauthorized"}), 404
 
+    today = datetime.utcnow().date()
+    try:
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if 'from' in request.args else today - timedelta(days=90)
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if 'to' in request.args else today
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+    if end <= start:
+        return jsonify({"error": "to must be after from"}), 400
+    if (end - start).days > 731:
+        return jsonify({"error": "Date range cannot exceed two years"}), 400
 
+    key = (listing_id, start, end)
+    insights = listing_insights_cache.get(key)
+    if insights is None:
+        insights = listing_insights(listing_id, start, end)
+        listing_insights_cache.set(key, insights)
+    return jsonify(insights), 200
@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from models import Listing, db, User
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from locations import location_ids_for, autocomplete_locations
 
 
 listing_bp = Blueprint('listing', __name__)
@@ -60,7 +61,8 @@ def get_listings():
     if title:
         query = query.filter(Listing.title.like(f'%{title}%'))
     if location:
-        query = query.filter(Listing.location.like(f'%{location}%'))
+        # Matched on the canonical location id instead of a LIKE scan
+        query = query.filter(Listing.location_id.in_(location_ids_for(location)))
     if min_price:
         query = query.filter(Listing.price_per_night >= min_price)
 
@@ -70,6 +72,13 @@ def get_listings():
     listings = query.all()
     return jsonify([listing.to_dict() for listing in listings])
 
+@listing_bp.route('/locations', methods=['GET'])
+def get_locations():
+    prefix = request.args.get('q', '')
+    if not prefix.strip():
+        return jsonify({"error": "q is required"}), 400
+    return jsonify([location.to_dict() for location in autocomplete_locations(prefix)]), 200
+
 @listing_bp.route('/listings/<int:listing_id>/status', methods=['GET'])
 @jwt_required()
 def get_listing_status(listing_id):
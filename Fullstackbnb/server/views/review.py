@@ -1,6 +1,7 @@
 from flask import jsonify, request, Blueprint
 from models import Review, Listing, User, db
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from leaderboards import record_review_change
 review_bp = Blueprint('review', __name__)
 
 
@@ -14,6 +15,8 @@ def create_review():
     existing_review = Review.query.filter_by(user_id=user_id, listing_id=data['listing_id']).first()
     if existing_review:
         return jsonify({"error": "You have already reviewed this listing"}), 400
+    if not Listing.query.get(data['listing_id']):
+        return jsonify({"error": "Listing not found"}), 404
     
     new_review = Review(
         user_id=user_id,
@@ -24,6 +27,8 @@ def create_review():
     
     try:
         db.session.add(new_review)
+        db.session.flush()
+        record_review_change(new_review, new_review.rating, 1)
         db.session.commit()
         return jsonify({"message": "Review added successfully!"}), 201
     except Exception as e:
@@ -83,6 +88,7 @@ def delete_review(review_id):
         return jsonify({'error': "You are not authorized to delete this review"}), 403
     
     try:
+        record_review_change(review, -review.rating, -1)
         db.session.delete(review)
         db.session.commit()
         return jsonify({"message": "Review deleted successfully!"}), 200
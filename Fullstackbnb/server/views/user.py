@@ -1,5 +1,11 @@
 from flask import Blueprint, request, jsonify
-from models import db, User, Booking, Favorites, Review, Listing
+from models import db, User, Booking, BookingArchive, Listing, Review
+from ledger import rebuild_host_earnings
+from leaderboards import rebuild_leaderboards, remove_from_leaderboards
+from analytics import deleted_stat_days, reroll_daily_stats
+from occupancy import release_archived_stays
+from availability import is_range_blocked, release_holds, stay_price, availability_cache
+from cache import host_dashboard_cache, listing_insights_cache
 from datetime import datetime
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import jwt_required, get_jwt_identity
@@ -102,11 +108,28 @@ def delete_user(user_id):
     user = User.query.get(user_id)
     if not current_user or current_user.role != 'guest':
         return jsonify({"error": "You are not authorized to delete this account!"}), 403
-    Booking.query.filter_by(user_id=user.id).delete()
-    Favorites.query.filter_by(user_id=user.id).delete()
-    Review.query.filter_by(user_id=user.id).delete()
-    db.session.delete(user)
+    listing_ids = set()
+    for model in (Booking, BookingArchive):
+        listing_ids.update(row[0] for row in db.session.query(model.listing_id).filter_by(user_id=user.id).distinct())
+    listing_ids = list(listing_ids)
+    reviewed_ids = [row[0] for row in db.session.query(Review.listing_id).filter_by(user_id=user.id)]
+    host_ids = {row[0] for row in db.session.query(Listing.user_id).filter(Listing.id.in_(listing_ids + reviewed_ids))}
+    own_listing_ids = [row[0] for row in db.session.query(Listing.id).filter_by(user_id=user.id)]
+    stat_days = deleted_stat_days(user_ids=[user.id])
+    release_archived_stays(user.id)
+    # Bookings, holds, favorites, reviews and any listings of the user are
+    # removed by ON DELETE CASCADE
+    db.session.execute(db.delete(User).where(User.id == user.id))
+    # The guest's stays and reviews drop out of their hosts' earnings and
+    # leaderboards too
+    rebuild_host_earnings(listing_ids)
+    remove_from_leaderboards(own_listing_ids, [user.id])
+    rebuild_leaderboards(host_ids - {user.id})
+    reroll_daily_stats(stat_days)
     db.session.commit()
+    availability_cache.invalidate()
+    host_dashboard_cache.invalidate()
+    listing_insights_cache.invalidate()
     return jsonify({"success": "User deleted successfully!"})
 
 @user_bp.route('/users/bookings/<int:listing_id>', methods=['POST'])
@@ -139,17 +162,12 @@ def book_listing_for_user(listing_id):
         return jsonify({'error': 'Listing not found'}), 404
 
     # Check for overlapping bookings
-    overlapping = Booking.query.filter(
-        Booking.listing_id == listing_id,
-        Booking.check_out > check_in_date,
-        Booking.check_in < check_out_date
-    ).first()
+    overlapping = is_range_blocked(listing_id, check_in_date, check_out_date, user_id=int(user_id))
     if overlapping:
         return jsonify({'error': 'Listing is not available for the selected dates'}), 400
 
-    # ✅ Calculate total_price internally
-    nights = (check_out_date - check_in_date).days
-    total_price = listing.price_per_night * nights 
+    # ✅ Calculate total_price internally, honouring the host's nightly prices
+    total_price = stay_price(listing, check_in_date, check_out_date)
 
     # Create and store booking
     new_booking = Booking(
@@ -161,7 +179,10 @@ def book_listing_for_user(listing_id):
     )
 
     db.session.add(new_booking)
+    release_holds(listing_id, int(user_id))
     db.session.commit()
+    availability_cache.invalidate(listing_id)
+    host_dashboard_cache.invalidate(listing.user_id)
 
     return jsonify({
         'message': 'Booking successful',